@@ -0,0 +1,170 @@
+"""
+This module contains Numba-compiled versions of the Black-Scholes-Merton pricer and implied volatility solver in bsm_pricer.
+The public functions keep the bsm_pricer signatures and dispatch to the compiled kernels.
+"""
+
+import math
+import numpy as np
+from numba import njit, prange, vectorize, guvectorize
+
+import bsm_pricer as bsm
+
+SQRT1_2 = 1.0 / math.sqrt(2.0)
+INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+@njit(cache=True, fastmath=True)
+def _ncdf(x):
+    """Standard normal CDF, via erfc so that the left tail keeps its relative precision."""
+    return 0.5 * math.erfc(-x * SQRT1_2)
+
+
+@njit(cache=True, fastmath=True)
+def _call_price(S, K, T, r, sigma):
+    """European call price."""
+    sqrt_T = math.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    return S * _ncdf(d1) - K * math.exp(-r * T) * _ncdf(d2)
+
+
+@njit(cache=True, fastmath=True)
+def _put_price(S, K, T, r, sigma):
+    """European put price."""
+    sqrt_T = math.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    return K * math.exp(-r * T) * _ncdf(-d2) - S * _ncdf(-d1)
+
+
+@njit(cache=True, fastmath=True)
+def _vega(S, K, T, r, sigma):
+    """Option vega (same for calls and puts)."""
+    sqrt_T = math.sqrt(T)
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * sqrt_T)
+    return S * INV_SQRT_2PI * math.exp(-0.5 * d1 * d1) * sqrt_T
+
+
+@vectorize(['float64(float64, float64, float64, float64, float64)'], target='parallel', fastmath=True, cache=True)
+def european_call_price_ufunc(S, K, T, r, sigma):
+    """European call price as a parallel NumPy ufunc: broadcasts its inputs like any other ufunc."""
+    return _call_price(S, K, T, r, sigma)
+
+
+@vectorize(['float64(float64, float64, float64, float64, float64)'], target='parallel', fastmath=True, cache=True)
+def european_put_price_ufunc(S, K, T, r, sigma):
+    """European put price as a parallel NumPy ufunc: broadcasts its inputs like any other ufunc."""
+    return _put_price(S, K, T, r, sigma)
+
+
+@njit(cache=True)
+def _iv_newton_bisect(market, S, K, T, r, is_call, sigma0, tol, maxit, lo, hi):
+    """
+    Newton-Raphson on the price residual, kept inside the bracket [lo, hi].
+    Falls back to bisection when the Newton step leaves the bracket or vega is too small.
+    Returns NaN if the method does not converge within maxit iterations, e.g. for a price no volatility in [lo, hi] reaches.
+    """
+    if not (math.isfinite(market) and math.isfinite(S) and math.isfinite(K) and math.isfinite(T) and math.isfinite(r)):
+        return np.nan
+
+    lo0, hi0 = lo, hi
+    sigma = sigma0
+    for _ in range(maxit):
+        if is_call:
+            diff = _call_price(S, K, T, r, sigma) - market
+        else:
+            diff = _put_price(S, K, T, r, sigma) - market
+        if abs(diff) < tol:
+            return sigma
+
+        # price is increasing in sigma
+        if diff < 0:
+            lo = sigma
+        else:
+            hi = sigma
+
+        vega = _vega(S, K, T, r, sigma)
+        if vega < 1e-10:
+            sigma_new = 0.5 * (lo + hi)
+        else:
+            sigma_new = sigma - diff / vega
+            if sigma_new <= lo or sigma_new >= hi:
+                sigma_new = 0.5 * (lo + hi)
+
+        # a small step only counts once the bracket has moved off both bounds, i.e. the price error changed sign:
+        # otherwise (e.g. a price below intrinsic) bisection collapses the bracket onto a bound, which is no root
+        if abs(sigma_new - sigma) < tol and lo > lo0 and hi < hi0:
+            return sigma_new
+        sigma = sigma_new
+
+    return np.nan
+
+
+@njit(parallel=True, cache=True)
+def iv_chain_parallel(market, S, K, T, r, is_call, sigma0=0.05, tol=1e-10, maxit=50, lo=0.00001, hi=5.0):
+    """
+    Implied volatility of every option of a chain, solved in parallel over the CPU cores (prange over the options).
+    market, S, K, T, r are 1-D float64 arrays of the same length and is_call is a boolean array.
+    """
+    n = market.shape[0]
+    out = np.empty(n)
+    for i in prange(n):
+        out[i] = _iv_newton_bisect(market[i], S[i], K[i], T[i], r[i], is_call[i], sigma0, tol, maxit, lo, hi)
+    return out
+
+
+@guvectorize(['void(float64, float64, float64, float64, float64, boolean, float64[:])'], '(),(),(),(),(),()->()',
+             target='parallel', cache=True)
+def calc_implied_volatility_batch(market, S, K, T, r, is_call, iv):
+    """
+    Implied volatility as a parallel NumPy gufunc: the inputs broadcast against each other, so any array of options
+    (e.g. a whole chain, or dates x strikes) is solved in one call, with the default settings of iv_chain_parallel.
+    is_call is a boolean array. NaN where the method did not converge.
+    """
+    iv[0] = _iv_newton_bisect(market, S, K, T, r, is_call, 0.05, 1e-10, 50, 0.00001, 5.0)
+
+
+def european_call_price(S, K, T, r, sigma):
+    """Compiled version of bsm_pricer.european_call_price."""
+    return _call_price(float(S), float(K), float(T), float(r), float(sigma))
+
+
+def european_put_price(S, K, T, r, sigma):
+    """Compiled version of bsm_pricer.european_put_price."""
+    return _put_price(float(S), float(K), float(T), float(r), float(sigma))
+
+
+def calc_vega(S, K, T, r, sigma):
+    """Compiled version of bsm_pricer.calc_vega."""
+    return _vega(float(S), float(K), float(T), float(r), float(sigma))
+
+
+def iv_newton_raphson(market_price, S, K, T, r, is_call=True, sigma_est=0.1, tol=1e-10, max_iter=100,
+                      bounds=(0.00001, 5.0)):
+    """
+    Compiled version of bsm_pricer.iv_newton_raphson, using a bracketed Newton-Raphson method with bisection fallback.
+
+    Returns:
+    float: The implied volatility of the option, NaN if the method fails to converge.
+    """
+    return _iv_newton_bisect(float(market_price), float(S), float(K), float(T), float(r), bool(is_call),
+                             float(sigma_est), float(tol), int(max_iter), float(bounds[0]), float(bounds[1]))
+
+
+def iv_newton_raphson_vectorized(market_price, S, K, T, r, option_type='call', tol=1e-10, initial_guess=0.05,
+                                 bounds=(0.00001, 5.0), max_iter=50):
+    """
+    Compiled version of bsm_pricer.iv_newton_raphson_vectorized. The options are solved in parallel over all CPU cores.
+
+    Returns:
+    np.ndarray: The implied volatilities. NaN where the method did not converge.
+    """
+    market_price, S, K, T, r = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (market_price, S, K, T, r)))
+    shape = market_price.shape
+    is_call = bsm._is_call_mask(option_type, shape)
+
+    iv = iv_chain_parallel(*(np.ascontiguousarray(x).ravel() for x in (market_price, S, K, T, r, is_call)),
+                   float(initial_guess), float(tol), int(max_iter), float(bounds[0]), float(bounds[1]))
+    return iv.reshape(shape)
@@ -2,10 +2,16 @@
 This module contains functions for pricing European call and put options using the Black-Scholes-Merton model, as well as calculating implied volatility.
 """
 
+import os
 import math
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from scipy.stats import norm
-from scipy.optimize import minimize, newton
+from scipy.special import ndtr
+from scipy.optimize import root_scalar, brenth
+
+# constants for the standard normal CDF/PDF, computed once at import
+SQRT1_2 = 1.0 / math.sqrt(2.0)
+INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
 
 
 def european_call_price(S, K,  T, r, sigma):
@@ -23,8 +29,9 @@ def european_call_price(S, K,  T, r, sigma):
     float: Price of the European call option
     """
     
-    d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
-    d2 = d1 - sigma * math.sqrt(T)
+    vol_sqrt_T = sigma * math.sqrt(T)
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
     
     call_price = S * norm_cdf(d1) - K * math.exp(-r * T) * norm_cdf(d2)
     return call_price
@@ -45,8 +52,9 @@ def european_put_price(S, K, T, r, sigma):
     float: The price of the European put option.
     """
     
-    d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
-    d2 = d1 - sigma * math.sqrt(T)
+    vol_sqrt_T = sigma * math.sqrt(T)
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
     
     put_price = K * math.exp(-r * T) * norm_cdf(-d2) - S * norm_cdf(-d1)
     return put_price
@@ -57,13 +65,14 @@ def norm_cdf(x):
     Calculates the cumulative distribution function (CDF) of the standard normal distribution.
 
     Parameters:
-    x (float): The value at which to evaluate the CDF.
+    x (float or array-like): The value at which to evaluate the CDF.
 
     Returns:
-    float: The CDF value at x.
+    float or np.ndarray: The CDF value at x.
     """
-    # return (1.0 + math.erf(x / math.sqrt(2.0))) / 2.0
-    return norm.cdf(x)
+    if np.ndim(x):
+        return ndtr(x)
+    return 0.5 * (1.0 + math.erf(x * SQRT1_2))
 
 
 def norm_pdf(x):
@@ -71,72 +80,203 @@ def norm_pdf(x):
     Calculates the probability density function (PDF) of the standard normal distribution.
 
     Parameters:
-    x (float): The value at which to evaluate the PDF.
+    x (float or array-like): The value at which to evaluate the PDF.
 
     Returns:
-    float: The PDF value at x.
+    float or np.ndarray: The PDF value at x.
     """
-    # return math.exp(-0.5 * x**2) / math.sqrt(2 * math.pi)
-    return norm.pdf(x)
+    if np.ndim(x):
+        x = np.asarray(x)
+        return np.exp(-0.5 * x * x) * INV_SQRT_2PI
+    return INV_SQRT_2PI * math.exp(-0.5 * x * x)
 
 
 def calc_vega(S, K, T, r, sigma):
     '''Calculate option vega using Black-Scholes-Merton model.'''
     
-    d1 = (np.log(S/K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    d1 = (np.log(S/K) + (r + 0.5 * sigma * sigma) * T) / (sigma * np.sqrt(T))
     return S * norm_pdf(d1) * np.sqrt(T)
 
 
-
-def iv_objective(sigma, market_price, S, K, T, r, option_type):
+def _price_and_vega(S, K, T, r, sigma, is_call):
     """
-    Objective function to calculate implied volatility for quasi-newton methods.
+    Calculates the Black-Scholes-Merton price and vega of a single European option, sharing d1, sqrt(T) and the discount factor between the two.
+    
+    Returns:
+    tuple of (price: float, vega: float)
     """
+    sqrt_T = math.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    disc_K = K * math.exp(-r * T)
     
-    if option_type.lower() in ['call', 'c']:
-        theoretical_price = european_call_price(S=S, K=K, T=T, r=r, sigma=sigma)
+    if is_call:
+        price = S * norm_cdf(d1) - disc_K * norm_cdf(d2)
     else:
-        theoretical_price = european_put_price(S=S, K=K, T=T, r=r, sigma=sigma)
-        
-    # print(option_type, 'price:',theoretical_price, sigma, market_price, (theoretical_price - market_price)**2)
-    return (theoretical_price - market_price)**2
+        price = disc_K * norm_cdf(-d2) - S * norm_cdf(-d1)
+    vega = S * norm_pdf(d1) * sqrt_T
+    return price, vega
+
+
+def european_call_price_vec(S, K, T, r, sigma):
+    """
+    Vectorized version of european_call_price. All inputs are broadcast against each other with NumPy,
+    so a full options chain is priced in one pass.
+
+    Uses the compiled parallel ufunc of bsm_numba when numba is installed.
+
+    Returns:
+    np.ndarray: Prices of the European call options.
+    """
+    try:
+        import bsm_numba
+        return bsm_numba.european_call_price_ufunc(S, K, T, r, sigma)
+    except ImportError:
+        return price_and_vega_vec(S, K, T, r, sigma, is_call=True)[0]
+
+
+def european_put_price_vec(S, K, T, r, sigma):
+    """
+    Vectorized version of european_put_price. All inputs are broadcast against each other with NumPy.
+
+    Uses the compiled parallel ufunc of bsm_numba when numba is installed.
+
+    Returns:
+    np.ndarray: Prices of the European put options.
+    """
+    try:
+        import bsm_numba
+        return bsm_numba.european_put_price_ufunc(S, K, T, r, sigma)
+    except ImportError:
+        return price_and_vega_vec(S, K, T, r, sigma, is_call=False)[0]
+
+
+def price_and_vega_vec(S, K, T, r, sigma, is_call=True):
+    """
+    Calculates the Black-Scholes-Merton price and vega of European options in a single pass,
+    sharing d1, sqrt(T) and the discount factor between the two.
+
+    Parameters:
+    S, K, T, r, sigma (float or array-like): Same as european_call_price, broadcast against each other.
+    is_call (bool or array-like of bool, optional): True for calls, False for puts. Defaults to True.
+
+    Returns:
+    tuple of (price: np.ndarray, vega: np.ndarray)
+    """
+    S, K, T, r, sigma = (np.asarray(x, dtype=np.float64) for x in (S, K, T, r, sigma))
 
+    sqrt_T = np.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    disc_K = K * np.exp(-r * T)
+
+    call_price = S * ndtr(d1) - disc_K * ndtr(d2)
+    # put via put-call parity
+    price = np.where(is_call, call_price, call_price - S + disc_K)
+    vega = S * INV_SQRT_2PI * np.exp(-0.5 * d1 * d1) * sqrt_T
+    return price, vega
+
+
+
+def iv_objective(sigma, market_price, S, K, T, r, is_call):
+    """
+    Objective function to calculate implied volatility with root-finding methods: the signed pricing error.
+    The option price is strictly increasing in sigma, so the implied volatility is the single root of this function.
+    """
+    
+    theoretical_price = european_call_price(S, K, T, r, sigma) if is_call else european_put_price(S, K, T, r, sigma)
+    return theoretical_price - market_price
+
+
+def iv_objective_sq(sigma, market_price, S, K, T, r, is_call):
+    """
+    Squared pricing error, for minimization methods.
+    """
+    return iv_objective(sigma, market_price, S, K, T, r, is_call)**2
+
+
+
+def _initial_sigma(S, K, T, r, market_price, is_call):
+    """
+    Closed-form approximation of the implied volatility (Corrado and Miller, 1996), used as the starting point of the IV solvers.
+    Puts are converted to the equivalent call price via put-call parity.
+
+    Returns:
+    float: The approximate implied volatility, clipped to [1e-4, 5].
+    """
+    disc_K = K * math.exp(-r * T)
+    call_price = market_price if is_call else market_price + S - disc_K
+    
+    x = call_price - 0.5 * (S - disc_K)
+    sigma = math.sqrt(2 * math.pi / T) / (S + disc_K) * (x + math.sqrt(max(0.0, x * x - (S - disc_K)**2 / math.pi)))
+    return min(max(sigma, 1e-4), 5.0)
+
+
+def _initial_bracket(S, K, T, r, market_price, is_call, sigma_est, bounds):
+    """
+    Narrows the bounds to the side of sigma_est that contains the implied volatility (the option price is increasing in sigma).
+    
+    Returns:
+    tuple: The lower and upper bounds of the implied volatility.
+    """
+    price = european_call_price(S, K, T, r, sigma_est) if is_call else european_put_price(S, K, T, r, sigma_est)
+    if price > market_price:
+        return bounds[0], sigma_est
+    return sigma_est, bounds[1]
 
 
 def calc_implied_volatility(market_price, S, K, T, r, option_type, method='newton_raphson',
-                            tol=1e-12, initial_guess=0.05, bounds=(0.00001, 5.0)):
+                            tol=1e-12, initial_guess=None, bounds=(0.00001, 5.0)):
     """
     Calculates the implied volatility of an option using various methods. Options for method are 'quasi_newton', 'newton_raphson', 'binary_search', and 'all'. If method=='all', the function returns a dictionary containing the implied volatilities calculated using different methods.
+    Array inputs (a whole options chain) are solved in parallel by iv_chain_parallel, with method 'newton_raphson' only.
 
     Parameters:
-    - market_price (float): The market price of the option.
-    - S (float): The current price of the underlying asset.
-    - K (float): The strike price of the option.
-    - T (float): The time to expiration of the option.
-    - r (float): The risk-free interest rate.
-    - option_type (str): The type of the option ('call' or 'put').
+    - market_price (float or array-like): The market price of the option.
+    - S (float or array-like): The current price of the underlying asset.
+    - K (float or array-like): The strike price of the option.
+    - T (float or array-like): The time to expiration of the option.
+    - r (float or array-like): The risk-free interest rate.
+    - option_type (str or array-like): The type of the option ('call' or 'put'), or one flag per option for array inputs.
     - method (str, optional): The method to use for calculating implied volatility. Defaults to 'newton_raphson'.
     - tol (float, optional): The tolerance for convergence. Defaults to 1e-12.
-    - initial_guess (float, optional): The initial guess for implied volatility. Defaults to 0.05.
+    - initial_guess (float, optional): The initial guess for implied volatility. Defaults to None, which uses the Corrado-Miller approximation (0.05 for every option of array inputs).
     - bounds (tuple, optional): The lower and upper bounds for implied volatility. Defaults to (0.00001, 5.0).
 
     Returns:
     - dict: The implied volatility of the option. If method is 'all', returns a dictionary containing the implied volatilities calculated using different methods.
     """
     
+    # a whole options chain is solved in parallel (newton_raphson only)
+    if any(np.ndim(x) > 0 for x in (market_price, S, K, T, r, option_type)):
+        if method != 'newton_raphson':
+            raise ValueError("Array inputs are only supported with method='newton_raphson'.")
+        iv = iv_chain_parallel(market_price, S, K, T, r, option_type=option_type, tol=tol, bounds=bounds,
+                               initial_guess=0.05 if initial_guess is None else initial_guess)
+        return {'newton_raphson': iv}
+
+    # a single flag: 'call'/'c' or 'put'/'p' (also a NumPy string from a DataFrame cell), or a boolean is_call
+    is_call = bool(_is_call_mask(option_type, ()))
+    if initial_guess is None:
+        initial_guess = _initial_sigma(S, K, T, r, market_price, is_call)
+    if method in ['binary_search', 'all']:
+        sigma_low, sigma_high = _initial_bracket(S, K, T, r, market_price, is_call, initial_guess, bounds)
+    
     if method == 'quasi_newton':
-        iv_qn = iv_quasi_newton(market_price=market_price, S=S, K=K, T=T, r=r, option_type=option_type, tol=tol, initial_guess=initial_guess, bounds=bounds)
+        iv_qn = iv_quasi_newton(market_price=market_price, S=S, K=K, T=T, r=r, is_call=is_call, tol=tol, initial_guess=initial_guess, bounds=bounds)
         return {'quasi_newton': iv_qn}
     elif method=='newton_raphson':
-        iv_nr = iv_newton_raphson(market_price=market_price, S=S, K=K, T=T, r=r, option_type=option_type, sigma_est=initial_guess)
+        iv_nr = iv_newton_raphson(market_price=market_price, S=S, K=K, T=T, r=r, is_call=is_call, sigma_est=initial_guess)
         return {'newton_raphson': iv_nr}
     elif method=='binary_search':
-        iv_bs = iv_binary_search(market_price=market_price, S=S, K=K, T=T, r=r, option_type=option_type, sigma_low=initial_guess, sigma_high=5, tolerance=tol)
+        iv_bs = iv_binary_search(market_price=market_price, S=S, K=K, T=T, r=r, is_call=is_call, sigma_low=sigma_low, sigma_high=sigma_high, tolerance=tol)
         return {'binary_search': iv_bs}
     elif method=='all':
-        iv_qn = iv_quasi_newton(market_price=market_price, S=S, K=K, T=T, r=r, option_type=option_type, tol=tol, initial_guess=initial_guess, bounds=bounds)
-        iv_nr = iv_newton_raphson(market_price=market_price, S=S, K=K, T=T, r=r, option_type=option_type, sigma_est=initial_guess)
-        iv_bs = iv_binary_search(market_price=market_price, S=S, K=K, T=T, r=r, option_type=option_type, sigma_low=initial_guess, sigma_high=5, tolerance=tol)
+        iv_qn = iv_quasi_newton(market_price=market_price, S=S, K=K, T=T, r=r, is_call=is_call, tol=tol, initial_guess=initial_guess, bounds=bounds)
+        iv_nr = iv_newton_raphson(market_price=market_price, S=S, K=K, T=T, r=r, is_call=is_call, sigma_est=initial_guess)
+        iv_bs = iv_binary_search(market_price=market_price, S=S, K=K, T=T, r=r, is_call=is_call, sigma_low=sigma_low, sigma_high=sigma_high, tolerance=tol)
         
         return {'quasi_newton': iv_qn,
                 'newton_raphson': iv_nr,
@@ -165,9 +305,10 @@ def check_nearest_iv(iv_results: dict, check_iv: float):
 
 
 # Function to calculate implied volatility
-def iv_quasi_newton(market_price, S, K, T, r, option_type, tol=1e-15, initial_guess=0.1, bounds=(0.00001, 5.0)):
+def iv_quasi_newton(market_price, S, K, T, r, is_call, tol=1e-15, initial_guess=0.1, bounds=(0.00001, 5.0)):
     """
-    Calculates the implied volatility using a quasi-Newton optimization method with scipy.optimize.minimize.
+    Calculates the implied volatility by finding the root of the signed pricing error (iv_objective) within the bounds,
+    using Brent's method with hyperbolic extrapolation (scipy.optimize.root_scalar, method='brenth').
 
     Parameters:
     - market_price (float): The observed market price of the option.
@@ -175,38 +316,31 @@ def iv_quasi_newton(market_price, S, K, T, r, option_type, tol=1e-15, initial_gu
     - K (float): The strike price of the option.
     - T (float): The time to expiration of the option in years.
     - r (float): The risk-free interest rate.
-    - option_type (str): The type of the option, either 'call' or 'put'.
-    - tol (float, optional): The tolerance level for convergence. Defaults to 1e-12.
-    - initial_guess (float, optional): The initial guess for the volatility. Defaults to 0.05.
-    - bounds (tuple, optional): The lower and upper bounds for the volatility. Defaults to (0.00001, 5.0).
+    - is_call (bool): True for a call option, False for a put option.
+    - tol (float, optional): The tolerance level for convergence. Defaults to 1e-15.
+    - initial_guess (float, optional): Not used by the bracketing method, kept for compatibility. Defaults to 0.1.
+    - bounds (tuple, optional): The lower and upper bounds for the volatility, used as the bracket. Defaults to (0.00001, 5.0).
 
     Returns:
-    - float: The implied volatility of the option.
-
-    Raises:
-    - ValueError: If the optimization was not successful.
-
+    - float: The implied volatility of the option. NaN if the root is not bracketed by the bounds or the method did not converge.
     """
     
-    # Initial guess for volatility
-    initial_guess = [initial_guess]
-    
-    # Bounds for volatility (must be positive)
-    bounds = [bounds]
-    
-    # Minimize the objective function
-    result = minimize(iv_objective, initial_guess, args=(market_price, S, K, T, r, option_type),
-                      bounds=bounds, method='L-BFGS-B', options={'eps': tol, 'gtol': tol})
+    try:
+        result = root_scalar(iv_objective, args=(market_price, S, K, T, r, is_call),
+                             method='brenth', bracket=bounds, xtol=tol)
+    except ValueError:
+        # the bounds do not bracket the root
+        result = None
     
-    if result.success:
-        return result.x[0]  # Return the optimized volatility
+    if result is not None and result.converged:
+        return result.root
     else:
-        print(ValueError(f">> Optimization was not successful. S={S}, K={K}, T={T}, r={r}, option_type={option_type}, market_price={market_price}"))
+        print(ValueError(f">> Optimization was not successful. S={S}, K={K}, T={T}, r={r}, is_call={is_call}, market_price={market_price}"))
         return np.nan
         
 
 
-def iv_newton_raphson(market_price, S, K, T, r, option_type='call', sigma_est = 0.1):
+def iv_newton_raphson(market_price, S, K, T, r, is_call=True, sigma_est = 0.1):
     """
     Calculate implied volatility (IV) using the Newton-Raphson method.
 
@@ -216,7 +350,7 @@ def iv_newton_raphson(market_price, S, K, T, r, option_type='call', sigma_est =
     K (float): The strike price of the option.
     T (float): The time to expiration of the option.
     r (float): The risk-free interest rate.
-    option_type (str, optional): The type of the option, either 'call' or 'put'. Defaults to 'call'.
+    is_call (bool, optional): True for a call option, False for a put option. Defaults to True.
     sigma_est (float, optional): An initial estimate for the volatility. Defaults to 0.1.
 
     Returns:
@@ -226,27 +360,24 @@ def iv_newton_raphson(market_price, S, K, T, r, option_type='call', sigma_est =
     - The function uses the Newton-Raphson method to iteratively find the implied volatility.
     - If the method fails to converge, the function returns NaN.
     """
-    
-    def f(sigma):
-        """Function of sigma - market price."""
-        if option_type.lower() in ['call', 'c']:
-            return european_call_price(S, K, T, r, sigma) - market_price
-        else:  # put option
-            return european_put_price(S, K, T, r, sigma) - market_price
 
-    # Calculate IV using newton method provided by scipy
-    # The newton method's fprime parameter is where the derivative of the function (Vega in this case) is passed
+    def f_and_fprime(sigma):
+        """Function of sigma - market price, and its derivative (vega), evaluated together."""
+        price, vega = _price_and_vega(S, K, T, r, sigma, is_call)
+        return price - market_price, vega
+
+    # Calculate IV using the newton method provided by scipy
+    # fprime=True tells root_scalar that the function returns both the value and the derivative (Vega in this case)
     try:
-        # Ensuring calc_vega is used correctly as the derivative of the price w.r.t. sigma
-        iv = newton(f, sigma_est, fprime=lambda sigma: calc_vega(S, K, T, r, sigma))
-        return iv
+        sol = root_scalar(f_and_fprime, x0=sigma_est, fprime=True, method='newton')
+        return sol.root if sol.converged else np.nan
     except RuntimeError:
         return np.nan  # Return NaN if the method fails to converge
     
 
-def iv_binary_search(market_price, S, K, T, r, option_type='call', sigma_low = 0.001,  sigma_high = 1, tolerance = 1e-5):
+def iv_binary_search(market_price, S, K, T, r, is_call=True, sigma_low = 0.001,  sigma_high = 1, tolerance = 1e-5):
     """
-    Calculate the implied volatility (IV) using binary search.
+    Calculate the implied volatility (IV) using a bracketing root-finder (Brent's method with hyperbolic extrapolation, scipy.optimize.brenth).
     
     Parameters:
     - option_market_price (float): The market price of the option.
@@ -254,29 +385,166 @@ def iv_binary_search(market_price, S, K, T, r, option_type='call', sigma_low = 0
     - K (float): The strike price of the option.
     - T (float): The time to expiration of the option.
     - r (float): The risk-free interest rate.
-    - option_type (str, optional): The type of the option, either 'call' or 'put'. Defaults to 'call'.
+    - is_call (bool, optional): True for a call option, False for a put option. Defaults to True.
     - sigma_low (float, optional): The lower bound of the volatility range. Defaults to 0.001.
     - sigma_high (float, optional): The upper bound of the volatility range. Defaults to 1.
-    - tolerance (float, optional): The tolerance level for convergence. Defaults to 1e-5.
+    - tolerance (float, optional): The tolerance level for convergence on the volatility. Defaults to 1e-5.
     
     Returns:
-    - float: The implied volatility of the option.
+    - float: The implied volatility of the option. NaN if the market price is not attainable within [sigma_low, sigma_high].
     """
     
-    while sigma_low < sigma_high:
-        sigma_mid = (sigma_low + sigma_high) / 2
-        price_mid = european_call_price(S, K, T, r, sigma_mid) if option_type == 'call' else european_put_price(S, K, T, r, sigma_mid)
+    def f(sigma):
+        """Function of sigma - market price."""
+        price = european_call_price(S, K, T, r, sigma) if is_call else european_put_price(S, K, T, r, sigma)
+        return price - market_price
+
+    try:
+        return brenth(f, sigma_low, sigma_high, xtol=tolerance, maxiter=100)
+    except ValueError:
+        # f(sigma_low) and f(sigma_high) have the same sign, i.e. the root is not bracketed
+        return np.nan
+    except RuntimeError:
+        # brenth did not converge within maxiter: fall back to bisection, which always terminates
+        return _bisect_float_bits(f, sigma_low, sigma_high)
+
+
+def _bisect_float_bits(f, sigma_low, sigma_high):
+    """
+    Find the root of an increasing function f in [sigma_low, sigma_high] by bisecting the IEEE-754 bit pattern of sigma.
+    
+    For positive floats the ordering of the bit patterns (as integers) matches the ordering of the values, so halving the
+    bit bracket takes at most 64 steps to reach adjacent floats, however wide the bracket is relative to the root.
+    
+    Returns:
+    - float: The lower end of the final bracket.
+    """
+    lo_bits = int(np.float64(sigma_low).view(np.uint64))
+    hi_bits = int(np.float64(sigma_high).view(np.uint64))
+    
+    while hi_bits - lo_bits > 1:
+        mid_bits = (lo_bits + hi_bits) >> 1
+        sigma_mid = float(np.uint64(mid_bits).view(np.float64))
+        f_mid = f(sigma_mid)
         
-        if abs(price_mid - market_price) < tolerance:
+        if f_mid == 0:
             return sigma_mid
-        elif price_mid < market_price:
-            sigma_low = sigma_mid
+        elif f_mid < 0:
+            lo_bits = mid_bits
         else:
-            sigma_high = sigma_mid
+            hi_bits = mid_bits
             
-    return (sigma_low + sigma_high) / 2
+    return float(np.uint64(lo_bits).view(np.float64))
+
+
+def _is_call_mask(option_type, shape):
+    """
+    Boolean call/put mask for a chain of options.
+    option_type is either a single string ('call'/'c' or 'put'/'p'), an array of them (e.g. the cp_flag column) or a boolean array.
+    Only the first character is compared, so per-row flags are checked without touching Python string objects.
+    """
+    if isinstance(option_type, str):
+        return np.full(shape, option_type.lower() in ['call', 'c'])
+    if np.asarray(option_type).dtype == bool:
+        return np.broadcast_to(option_type, shape)
+    first = np.asarray(option_type, dtype='U1')
+    return np.broadcast_to((first == 'C') | (first == 'c'), shape)
 
 
+def iv_newton_raphson_vectorized(market_price, S, K, T, r, option_type='call', tol=1e-10, initial_guess=0.05,
+                                 bounds=(0.00001, 5.0), max_iter=50):
+    """
+    Calculate the implied volatility of a whole options chain at once using a bracketed Newton-Raphson method.
+
+    Every iteration prices all options in one vectorized pass (price_and_vega_vec). The bracket [lo, hi] around
+    each root is tightened with the sign of the pricing error, and the Newton step is replaced by bisection
+    whenever it leaves the bracket or vega is too small (deep ITM/OTM options).
+
+    Parameters:
+    - market_price (array-like): The market prices of the options.
+    - S, K, T, r (float or array-like): Underlying price, strike, time to expiration (in years) and risk-free rate, broadcast against market_price.
+    - option_type (str or array-like, optional): The type of the options, either 'call' or 'put', or one flag per option ('C'/'P'). Defaults to 'call'.
+    - tol (float, optional): The tolerance for convergence on the price error or the volatility step. Defaults to 1e-10.
+    - initial_guess (float, optional): The initial guess for implied volatility. Defaults to 0.05.
+    - bounds (tuple, optional): The lower and upper bounds for implied volatility. Defaults to (0.00001, 5.0).
+    - max_iter (int, optional): The maximum number of iterations. Defaults to 50.
+
+    Returns:
+    - np.ndarray: The implied volatilities. NaN where the method did not converge.
+    """
+    market_price, S, K, T, r = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (market_price, S, K, T, r)))
+    is_call = _is_call_mask(option_type, market_price.shape)
+
+    sigma = np.full_like(market_price, initial_guess)
+    lo = np.full_like(sigma, bounds[0])
+    hi = np.full_like(sigma, bounds[1])
+    converged = np.zeros(sigma.shape, dtype=bool)
+
+    for _ in range(max_iter):
+        price, vega = price_and_vega_vec(S, K, T, r, sigma, is_call=is_call)
+        diff = price - market_price
+
+        # shrink the bracket around the root: price is increasing in sigma
+        lo = np.where(diff < 0, sigma, lo)
+        hi = np.where(diff > 0, sigma, hi)
+
+        sigma_new = sigma - diff / np.maximum(vega, 1e-12)
+        # fall back to bisection when the Newton step leaves the bracket or vega is too small
+        use_bisection = (sigma_new <= lo) | (sigma_new >= hi) | (vega < 1e-10)
+        sigma_new = np.where(use_bisection, 0.5 * (lo + hi), sigma_new)
+
+        # a small step only counts once the bracket has moved off both bounds, i.e. the price error changed sign:
+        # otherwise (e.g. a price below intrinsic) bisection collapses the bracket onto a bound, which is no root
+        bracketed = (lo > bounds[0]) & (hi < bounds[1])
+        converged |= (np.abs(diff) < tol) | ((np.abs(sigma_new - sigma) < tol) & bracketed)
+        sigma = np.where(converged, sigma, sigma_new)
+        if converged.all():
+            break
+
+    return np.where(converged, sigma, np.nan)
+
+
+
+
+def iv_chain_parallel(market_price, S, K, T, r, option_type='call', tol=1e-10, initial_guess=0.05, bounds=(0.00001, 5.0),
+                      max_workers=None):
+    """
+    Calculate the implied volatility of a whole options chain in parallel over the CPU cores.
+
+    Uses the compiled prange kernel of bsm_numba when numba is installed. Otherwise the chain is split into one tile
+    per worker and each tile is solved by iv_newton_raphson_vectorized in a thread pool (NumPy releases the GIL
+    inside its ufuncs).
+
+    Parameters:
+    - market_price, S, K, T, r (float or array-like): Option prices and pricing inputs, broadcast against each other.
+    - option_type (str or array-like, optional): 'call' or 'put', or one flag per option ('C'/'P' or a boolean is_call array). Defaults to 'call'.
+    - tol (float, optional): The tolerance for convergence. Defaults to 1e-10.
+    - initial_guess (float, optional): The initial guess for implied volatility of every option. Defaults to 0.05.
+    - bounds (tuple, optional): The lower and upper bounds for implied volatility. Defaults to (0.00001, 5.0).
+    - max_workers (int, optional): The number of threads of the NumPy fallback. Defaults to the number of CPUs.
+
+    Returns:
+    - np.ndarray: The implied volatilities. NaN where the method did not converge.
+    """
+    try:
+        import bsm_numba
+        return bsm_numba.iv_newton_raphson_vectorized(market_price, S, K, T, r, option_type=option_type, tol=tol,
+                                                      initial_guess=initial_guess, bounds=bounds)
+    except ImportError:
+        pass
+
+    market_price, S, K, T, r = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (market_price, S, K, T, r)))
+    shape = market_price.shape
+    is_call = _is_call_mask(option_type, shape).ravel()
+    max_workers = max_workers or os.cpu_count() or 1
+
+    n_tiles = max(1, min(max_workers, market_price.size))
+    tiles = zip(*(np.array_split(x.ravel(), n_tiles) for x in (market_price, S, K, T, r, is_call)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda tile: iv_newton_raphson_vectorized(*tile[:5], option_type=tile[5], tol=tol,
+                                                                         initial_guess=initial_guess, bounds=bounds), tiles)
+        iv = np.concatenate(list(results))
+    return iv.reshape(shape)
 
 
 def calc_option_elasticity(delta, option_price, underlying_price, option_type='call'):
@@ -298,8 +566,8 @@ def calc_option_elasticity(delta, option_price, underlying_price, option_type='c
 
 
 def calc_option_delta(S, K, T, r, sigma):
-    # calculate delta of a European call option using Black-Scholes-Merton model
-    d1 = (math.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * math.sqrt(T))
+    # calculate delta of a European call option using Black-Scholes-Merton model (scalars or arrays)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * T) / (sigma * np.sqrt(T))
     delta = norm_cdf(d1)
     return delta
 
@@ -317,9 +585,9 @@ if __name__=='__main__':
     print('European put option price:', european_put_price(S=S, K=K, r=r, T=T, sigma=sigma))
     
     print('Implied volatility:')    
-    iv_qn = iv_quasi_newton(market_price=option_market_price, S=S, K=K, T=T, r=r, option_type='call', tol=1e-12, initial_guess=0.1, bounds=(0.00001, 5.0))
-    iv_nr = iv_newton_raphson(option_market_price, S, K, T, r, option_type='call', sigma_est = 0.1)
-    iv_bs = iv_binary_search(option_market_price, S, K, T, r, option_type='call', sigma_low = 0.001,  sigma_high = 1, tolerance = 1e-5)
+    iv_qn = iv_quasi_newton(market_price=option_market_price, S=S, K=K, T=T, r=r, is_call=True, tol=1e-12, initial_guess=0.1, bounds=(0.00001, 5.0))
+    iv_nr = iv_newton_raphson(option_market_price, S, K, T, r, is_call=True, sigma_est = 0.1)
+    iv_bs = iv_binary_search(option_market_price, S, K, T, r, is_call=True, sigma_low = 0.001,  sigma_high = 1, tolerance = 1e-5)
     iv_all = calc_implied_volatility(option_market_price, S, K, T, r, option_type='call', method='all', tol=1e-12, initial_guess=0.1, bounds=(0.00001, 5.0))
 
     print(f"IV (Quasi-Newton): {iv_qn}")
@@ -0,0 +1,48 @@
+"""
+This module contains Numba-compiled kernels of the level 3 IV filter in level_3_filters.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def _det3(a00, a01, a02, a10, a11, a12, a20, a21, a22):
+    """Determinant of a 3x3 matrix."""
+    return a00 * (a11 * a22 - a12 * a21) - a01 * (a10 * a22 - a12 * a20) + a02 * (a10 * a21 - a11 * a20)
+
+
+# no fastmath: reassociating the determinants would change which groups count as singular
+@njit(parallel=True, cache=True)
+def quadratic_coefs_by_group(offsets, x, y, singular_rtol):
+    """
+    Least-squares coefficients (a0, a1, a2) of y = a0 + a1*x + a2*x^2 within every group, in parallel over the groups.
+    The rows of group g are x[offsets[g]:offsets[g+1]], i.e. the data is sorted by group.
+    The 3x3 normal equations are solved with Cramer's rule; the coefficients of a singular or nearly singular group
+    (fewer than 3 distinct x values, up to rounding), whose det / (s0 * s2 * s4) is not above singular_rtol, are NaN.
+    """
+    n_groups = offsets.shape[0] - 1
+    coefs = np.empty((n_groups, 3))
+    for g in prange(n_groups):
+        s0 = s1 = s2 = s3 = s4 = t0 = t1 = t2 = 0.0
+        for i in range(offsets[g], offsets[g + 1]):
+            xi = x[i]
+            xi2 = xi * xi
+            s0 += 1.0
+            s1 += xi
+            s2 += xi2
+            s3 += xi2 * xi
+            s4 += xi2 * xi2
+            t0 += y[i]
+            t1 += xi * y[i]
+            t2 += xi2 * y[i]
+
+        det = _det3(s0, s1, s2, s1, s2, s3, s2, s3, s4)
+        # det <= s0 * s2 * s4 (Hadamard): compare relative to that bound, since rounding rarely leaves det exactly 0
+        if not det > singular_rtol * s0 * s2 * s4:
+            coefs[g, 0] = coefs[g, 1] = coefs[g, 2] = np.nan
+        else:
+            coefs[g, 0] = _det3(t0, s1, s2, t1, s2, s3, t2, s3, s4) / det
+            coefs[g, 1] = _det3(s0, t0, s2, s1, t1, s3, s2, t2, s4) / det
+            coefs[g, 2] = _det3(s0, s1, t0, s1, s2, t1, s2, s3, t2) / det
+    return coefs
@@ -16,13 +16,14 @@ DATA_DIR = Path(config.DATA_DIR)
 
 
 def calc_days_to_maturity(df):
-    # calc days to maturity
-    df = df.assign(days_to_maturity = df['exdate'].subtract(df['date']))
+    # calc days to maturity (calendar days, as integers); NaN if date or exdate is missing, and the range filters drop the row
+    days = (df['exdate'] - df['date']).dt.days
+    df = df.assign(days_to_maturity = days if days.isna().any() else days.astype('int16'))
     return df
 
 def days_to_maturity_filter(df, min_days=7, max_days=180):
     df = calc_days_to_maturity(df)
-    df = df[(df['days_to_maturity'] >= pd.Timedelta(days=min_days)) & (df['days_to_maturity'] <= pd.Timedelta(days=max_days))]
+    df = df[(df['days_to_maturity'] >= min_days) & (df['days_to_maturity'] <= max_days)]
     return df
 
 def iv_range_filter(df, min_iv=0.05, max_iv=1.00):
@@ -37,9 +38,8 @@ def moneyness_filter(df, min_moneyness=0.8, max_moneyness=1.2):
     """Filter options based on moneyness range.
        Default is 0.8 to 1.2.
        Moneyness is defined as the ratio of the option's strike price to the stock underlying price.
+       Expects the moneyness column (level_1_filters.calc_moneyness).
     """
-    if 'moneyness' not in df.columns:
-        df = f1.calc_moneyness(df)
     df = df[(df['moneyness'] > min_moneyness) & (df['moneyness'] < max_moneyness)].reset_index(drop=True)
     return df
 
@@ -48,40 +48,49 @@ def implied_interest_rate_filter(df):
     """
     Filters out options implying a negative interest rate based on put-call parity.
     Imputes missing rates using ATM options by maturity.
+    Expects the moneyness, mid_price and days_to_maturity columns (see apply_l2_filters).
     """
 
-    df['mid_price'] = (df['best_bid'] + df['best_offer']) / 2
-
     # Split calls and puts
-    calls = df[df['cp_flag'] == 'C'].copy()
-    puts = df[df['cp_flag'] == 'P'].copy()
+    calls = df[df['cp_flag'] == 'C']
+    puts = df[df['cp_flag'] == 'P']
 
-    # Match by date, exdate, moneyness
-    calls.set_index(['date', 'exdate', 'moneyness'], inplace=True)
-    puts.set_index(['date', 'exdate', 'moneyness'], inplace=True)
-    common = calls.index.intersection(puts.index)
-    c, p = calls.loc[common].reset_index(), puts.loc[common].reset_index()
+    # Match by date, exdate, moneyness (same pairing as the level 3 put-call parity filter)
+    matched = f3.build_put_call_pairs(calls, puts).reset_index()
 
-    # Merge and compute implied interest rate
-    matched = pd.merge(c, p, on=['date', 'exdate', 'moneyness'], suffixes=('_C', '_P'))
+    # Compute implied interest rate
     matched = f3.calc_implied_interest_rate(matched)
 
-    # Remove rows with negative implied rate
-    neg = matched[matched['pc_parity_int_rate'] < 0][['date', 'exdate', 'strike_price_C', 'close_C']].drop_duplicates()
-    df = df.merge(neg, left_on=['date', 'exdate', 'strike_price', 'close'], 
-                       right_on=['date', 'exdate', 'strike_price_C', 'close_C'], 
-                       how='outer', indicator=True)
-    df = df[df['_merge'] == 'left_only'].drop(columns=['_merge', 'strike_price_C', 'close_C'])
+    # Remove rows with negative implied rate: left join on a marker column (anti-join)
+    keys = ['date', 'exdate', 'strike_price', 'close']
+    neg = matched.loc[matched['pc_parity_int_rate'] < 0, ['date', 'exdate', 'strike_price_C', 'close_C']].drop_duplicates()
+    neg = neg.rename(columns={'strike_price_C': 'strike_price', 'close_C': 'close'}).assign(_neg_rate=True)
+    df = df.merge(neg, on=keys, how='left')
+    df = df[df['_neg_rate'].isna()].drop(columns='_neg_rate')
+    # rows are ordered by the join keys, so that the forward-fill below carries rates across maturities and days
+    df = df.sort_values(keys, kind='stable').reset_index(drop=True)
 
     # Impute missing rates using median from ATM calls
-    atm = matched[
-        (matched['moneyness'].between(0.95, 1.05)) &
-        (matched['pc_parity_int_rate'] >= 0)
-    ]
-    med = atm.groupby('days_to_maturity_C')['pc_parity_int_rate'].median().reset_index()
-    df = df.merge(med, left_on='days_to_maturity', right_on='days_to_maturity_C', how='left')
-    df['pc_parity_int_rate'] = df['pc_parity_int_rate'].ffill()
-    df.drop(columns='days_to_maturity_C', inplace=True)
+    atm = matched.query('0.95 <= moneyness <= 1.05 and pc_parity_int_rate >= 0')
+
+    # median rate by days to maturity: sort by (days, rate), then each group's median sits in the middle of its run
+    atm_days, atm_rates = atm['days_to_maturity_C'].to_numpy(), atm['pc_parity_int_rate'].to_numpy()
+    order = np.lexsort((atm_rates, atm_days))
+    atm_days, atm_rates = atm_days[order], atm_rates[order]
+    med_days, start, count = np.unique(atm_days, return_index=True, return_counts=True)
+    med_rates = 0.5 * (atm_rates[start + (count - 1) // 2] + atm_rates[start + count // 2])
+
+    # look up the median rate by days to maturity (med_days is sorted)
+    days = df['days_to_maturity'].to_numpy()
+    rates = np.full(len(df), np.nan)
+    if len(med_days):
+        pos = np.searchsorted(med_days, days).clip(max=len(med_days) - 1)
+        found = med_days[pos] == days
+        rates[found] = med_rates[pos[found]]
+
+    # forward-fill: each row takes the rate of the last row that has one
+    last_valid = np.maximum.accumulate(np.where(~np.isnan(rates), np.arange(len(rates)), 0))
+    df['pc_parity_int_rate'] = rates[last_valid]
 
     return df
 
@@ -92,12 +101,12 @@ def unable_to_compute_iv_filter(df):
     Time value = market price - intrinsic value.
     For calls: intrinsic = max(S - K, 0)
     For puts:  intrinsic = max(K - S, 0)
+    Expects the mid_price column (see apply_l2_filters).
     """
     # df = df.loc[df['IV'].notna()]
-    df['mid_price'] = (df['best_bid'] + df['best_offer']) / 2
 
     # Calculate intrinsic value
-    df['intrinsic'] = 0
+    df['intrinsic'] = 0.0
     call_mask = df['cp_flag'] == 'C'
     put_mask = df['cp_flag'] == 'P'
     df.loc[call_mask, 'intrinsic'] = (df.loc[call_mask, 'close'] - df.loc[call_mask, 'strike_price']).clip(lower=0)
@@ -111,14 +120,21 @@ def unable_to_compute_iv_filter(df):
 
 
 
-def apply_l2_filters(df):
+def apply_l2_filters(df, min_days=7, max_days=180, min_iv=0.05, max_iv=1.00, min_moneyness=0.8, max_moneyness=1.2):
     """Apply all level 2 filters to the dataframe.
+       The element-wise filters (days to maturity, IV range, moneyness) are evaluated as a single boolean mask
+       (numexpr-backed when available) and applied once, before the filters that need put/call pairs.
     """
-    df = filter_days_to_maturity(df)
-    df = filter_iv(df)
-    df = filter_moneyness(df)
-    df = filter_implied_interest_rate(df)
-    df = filter_unable_compute_iv(df)
+    df = calc_days_to_maturity(df)
+    df = f1.calc_moneyness(df)
+    mask = df.eval('(days_to_maturity >= @min_days) & (days_to_maturity <= @max_days)'
+                   ' & (IV >= @min_iv) & (IV <= @max_iv)'
+                   ' & (moneyness > @min_moneyness) & (moneyness < @max_moneyness)')
+    df = df[mask].reset_index(drop=True)
+    # derived once here, on the remaining rows, for the put-call parity and intrinsic value filters
+    df['mid_price'] = (df['best_bid'] + df['best_offer']) / 2
+    df = implied_interest_rate_filter(df)
+    df = unable_to_compute_iv_filter(df)
     return df
 
 # if __name__ == "__main__": 
\ No newline at end of file
@@ -3,11 +3,11 @@ This file contains a collection of functions for filtering and processing option
 
 Functions:
 - functimer: A decorator function that measures the execution time of a given function.
-- fit_and_store_curve: Fit a quadratic curve to a group of data points and store the fitted values.
+- quadratic_fit_by_group: Fit a quadratic curve to every group of data points at once and return the fitted values.
 - apply_quadratic_iv_fit: Apply quadratic curve fitting to the input data.
 - calc_relative_distance: Calculate the relative distance between two series of data.
 - mark_outliers: Determine if a data point is an outlier based on its moneyness_bin and relative distance from the fitted curve.
-- build_put_call_pairs: Build pairs of call and put options based on the same date, expiration date, and moneyness.
+- build_put_call_pairs: Build pairs of call and put options based on the same date, expiration date, and moneyness, in wide form.
 - test_price_strike_match: Check if the strike prices and security prices of matching calls and puts are equal.
 - calc_implied_interest_rate: Calculate the implied interest rate based on the given matched options data.
 - pcp_filter_outliers: Filter out outliers based on the relative distance of interest rates and the outlier threshold.
@@ -15,16 +15,8 @@ Functions:
 """
 
 # standard libraries
-import warnings
-warnings.filterwarnings("ignore")
-
 import pandas as pd
-pd.set_option('display.max_columns', None)
-
 import numpy as np
-import datetime
-import seaborn as sns
-import matplotlib.pyplot as plt
 
 # system libraries
 import os
@@ -44,6 +36,7 @@ import bsm_pricer as bsm
 
 from functools import partial
 import time
+import io
 
 # environment variables
 WRDS_USERNAME = Path(config.WRDS_USERNAME)
@@ -54,6 +47,13 @@ END_DATE_01 = config.END_DATE_01
 START_DATE_02 =config.START_DATE_02
 END_DATE_02 = config.END_DATE_02
 
+# charts are written to the output directory, created once here
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# relative determinant of the normal equations below which a quadratic fit is treated as rank-deficient,
+# by the NumPy fit and by the numba kernel (iv_fit_numba.quadratic_coefs_by_group) alike
+_SINGULAR_RTOL = 1e-12
+
 
 # Helper functions
 def functimer(func):
@@ -77,24 +77,76 @@ def functimer(func):
     return wrapper
 
 
-def fit_and_store_curve(group):
+def _quadratic_coefs(codes, x, y, n_groups):
+    """
+    Least-squares coefficients (a0, a1, a2) of every group, with NumPy.
+    The 3x3 normal equations of each group are built from per-group sums (np.bincount) and solved in one batched call.
+    Rank-deficient groups (fewer than 3 distinct x values, or nearly so) are solved by least squares on their rows instead.
+    """
+    x2 = x * x
+    # power sums: S_k = sum(x^k), k = 0..4, and T_k = sum(x^k * y), k = 0..2
+    S = [np.bincount(codes, weights=w, minlength=n_groups) for w in (np.ones_like(x), x, x2, x2 * x, x2 * x2)]
+    T = [np.bincount(codes, weights=w, minlength=n_groups) for w in (y, x * y, x2 * y)]
+    gram = np.stack([np.stack(S[i:i + 3], axis=-1) for i in range(3)], axis=1)
+    rhs = np.stack(T, axis=-1)[..., None]
+
+    # det(gram) <= S0 * S2 * S4 (Hadamard): a tiny ratio means the normal equations are singular up to rounding,
+    # which np.linalg.solve does not detect (it only raises on an exactly singular matrix)
+    singular = ~(np.linalg.det(gram) > _SINGULAR_RTOL * S[0] * S[2] * S[4])
+    gram[singular] = np.eye(3)
+    coefs = np.linalg.solve(gram, rhs)[..., 0]
+
+    # minimum-norm least squares on the column-scaled design matrix of each rank-deficient group, as np.polyfit does
+    for g in np.flatnonzero(singular):
+        rows = codes == g
+        design = np.vander(x[rows], 3, increasing=True)
+        scale = np.sqrt((design * design).sum(axis=0))
+        scale[scale == 0] = 1.0
+        coefs[g] = np.linalg.lstsq(design / scale, y[rows], rcond=len(design) * np.finfo(float).eps)[0] / scale
+    return coefs
+
+
+def quadratic_fit_by_group(codes, x, y):
     """
-    Fit a quadratic curve to the given group of data points and store the fitted values.
+    Least-squares fit of a quadratic curve in x within every group, for all groups at once.
+    Uses the compiled kernel of iv_fit_numba when numba is installed and the data is sorted by group, NumPy otherwise.
 
     Args:
-        group (pandas.DataFrame): The group of data points to fit the curve to.
+        codes (numpy.ndarray): The group number (0, 1, ..., n_groups-1) of every data point.
+        x (numpy.ndarray): The x values (moneyness).
+        y (numpy.ndarray): The y values (log IV).
 
     Returns:
-        pandas.DataFrame: The group of data points with the fitted values stored in the 'fitted_iv' column.
+        numpy.ndarray: The fitted values of every data point.
     """
+    n_groups = codes.max() + 1 if len(codes) else 0
+    # fit in u = x - 1: moneyness is close to 1, so the columns 1, x, x^2 are nearly collinear, while 1, u, u^2 are not
+    x = x - 1.0
+    coefs = None
     try:
-        # Fit the quadratic curve
-        coefficients = np.polyfit(group['moneyness'], group['log_iv'], 2)
-        # Calculate fitted values
-        group['fitted_iv'] = np.polyval(coefficients, group['moneyness'])
-    except np.RankWarning:
-        print("Polyfit may be poorly conditioned")
-    return group
+        import iv_fit_numba
+        if np.all(codes[:-1] <= codes[1:]):
+            offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=n_groups))))
+            coefs = iv_fit_numba.quadratic_coefs_by_group(offsets, x, y, _SINGULAR_RTOL)
+    except ImportError:
+        pass
+    if coefs is None:
+        # no numba or unsorted data
+        coefs = _quadratic_coefs(codes, x, y, n_groups)
+    else:
+        # refit only the (nearly) singular groups, which the kernel leaves as NaN, by least squares
+        singular = np.isnan(coefs).any(axis=1)
+        if singular.any():
+            rows = singular[codes]
+            groups, sub_codes = np.unique(codes[rows], return_inverse=True)
+            coefs[groups] = _quadratic_coefs(sub_codes, x[rows], y[rows], len(groups))
+
+    # Horner's rule over the whole column: fitted = c0 + x * (c1 + x * c2), in one buffer
+    fitted = coefs[codes, 2] * x
+    fitted += coefs[codes, 1]
+    fitted *= x
+    fitted += coefs[codes, 0]
+    return fitted
 
 
 
@@ -107,13 +159,25 @@ def apply_quadratic_iv_fit(l2_data):
     l2_data (DataFrame): The input data to which the quadratic curve fitting function will be applied.
 
     Returns:
-    DataFrame: The input data with the quadratic curve fitting applied.
+    DataFrame: The input data with the fitted values stored in the 'fitted_iv' column, indexed by (date, exdate, cp_flag) and the original index.
     """
-    # Apply the quadratic curve fitting function to the data
-    l2_data = l2_data.dropna(subset=['moneyness', 'log_iv']).groupby(['date', 'exdate', 'cp_flag']).filter(lambda group: len(group) >= 3)
-    
-    l2_data = l2_data.groupby(['date', 'exdate', 'cp_flag']).apply(fit_and_store_curve)
-    
+    group_keys = ['date', 'exdate', 'cp_flag']
+    # keep the groups with at least 3 data points
+    l2_data = l2_data.dropna(subset=['moneyness', 'log_iv'])
+    group_size = l2_data.groupby(group_keys, sort=False, observed=True)['moneyness'].transform('size')
+    l2_data = l2_data[group_size.to_numpy() >= 3]
+
+    # order the rows by group (sorted keys, original order within a group); the only groupby here that keeps sort=True,
+    # since its codes define the row order of the output
+    codes = l2_data.groupby(group_keys, observed=True).ngroup().to_numpy()
+    order = np.argsort(codes, kind='stable')
+    l2_data, codes = l2_data.iloc[order], codes[order]
+
+    # the normal equations are accumulated in float64, the fitted values are stored in the dtype of log_iv
+    fitted_iv = quadratic_fit_by_group(codes, l2_data['moneyness'].to_numpy(dtype=np.float64), l2_data['log_iv'].to_numpy(dtype=np.float64))
+    l2_data['fitted_iv'] = fitted_iv.astype(l2_data['log_iv'].dtype)
+    l2_data.index = pd.MultiIndex.from_arrays([l2_data[key] for key in group_keys] + [l2_data.index], names=group_keys + [l2_data.index.name])
+
     return l2_data
 
 
@@ -132,72 +196,67 @@ def calc_relative_distance(series1, series2, method='percent'):
         ValueError: If the method is not one of 'percent', 'manhattan', or 'euclidean'.
     """
     
+    if method not in ['percent', 'manhattan', 'euclidean']:
+        raise ValueError("Method must be 'percent', 'manhattan', or 'euclidean'")
+    
+    # keep float32 inputs in float32, anything else is computed in float64
+    dtype = np.result_type(np.asarray(series1).dtype, np.asarray(series2).dtype, np.float32)
+    series1 = np.asarray(series1, dtype=dtype)
+    series2 = np.asarray(series2, dtype=dtype)
+    
+    # all operations write into a single output buffer
+    result = np.subtract(series1, series2)
     if method == 'percent':
-        result = (series1 - series2) / series2 * 100
-    elif method == 'manhattan':
-        result = abs(series1 - series2)
-    elif method == 'euclidean':
-        result = np.sqrt((series1 - series2)**2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(result, series2, out=result)
+        result *= 100
     else:
-        raise ValueError("Method must be 'percent', 'manhattan', or 'euclidean'")
+        # the euclidean distance of two scalars is the absolute difference, as for manhattan
+        np.abs(result, out=result)
     
-    result = np.where(np.isinf(result), np.nan, result)
+    result[np.isinf(result)] = np.nan
     
     return result
 
 
-@functimer  
-def mark_outliers(row, std_devs, outlier_threshold):
+def mark_outliers(df, std_devs, outlier_threshold):
     """
-    Determines if a data point is an outlier based on its moneyness_bin and relative distance from the fitted curve.
+    Determines which data points are outliers based on their moneyness_bin and relative distance from the fitted curve.
     
     Args:
-        row (pandas.Series): A row of data containing the moneyness_bin and rel_distance columns.
+        df (pandas.DataFrame): Data containing the moneyness_bin and rel_distance columns.
         std_devs (pandas.DataFrame): A DataFrame containing the standard deviations for each moneyness_bin.
+        outlier_threshold (float): Number of standard deviations beyond which a data point is an outlier.
     
     Returns:
-        bool: True if the data point is an outlier, False otherwise.
+        pandas.Series: True where the data point is an outlier. Data points without a matching moneyness_bin are not outliers.
     """
-    
-    # Attempt to retrieve the standard deviation for the row's moneyness_bin
-    std_dev_row = std_devs.loc[std_devs['moneyness_bin'] == row['moneyness_bin'], 'std_dev']
-    
-    # Check if std_dev_row is empty (i.e., no matching moneyness_bin was found)
-    if not std_dev_row.empty:
-        std_dev = std_dev_row.values[0]
-        # Calculate how many std_devs away from the fitted curve the IV is
-        if abs(row['rel_distance']) > outlier_threshold * std_dev:  # Adjust this threshold as needed
-            return True
-    else:
-        # Handle the case where no matching moneyness_bin was found
-        return False
-    return False
+    std_map = std_devs.set_index('moneyness_bin')['std_dev']
+    return df['rel_distance'].abs() > outlier_threshold * df['moneyness_bin'].map(std_map).astype(float)
 
 
 def build_put_call_pairs(call_options, put_options):
     """
     Builds pairs of call and put options based on the same date, expiration date, and moneyness.
+    Moneyness is matched on integer ticks of 1e-8 (computed in float64, whatever the dtype of the moneyness column)
+    rather than on the float values themselves.
 
     Args:
         call_options (DataFrame): DataFrame containing call options data.
         put_options (DataFrame): DataFrame containing put options data.
 
     Returns:
-        tuple of (matching_calls: pd.DataFrame, matching_puts: pd.DataFrame)
+        DataFrame: One row per put-call pair, indexed by (date, exdate, moneyness), with the call and put columns suffixed '_C' and '_P'.
     """
-    call_options.set_index(['date', 'exdate', 'moneyness'], inplace=True)
-    put_options.set_index(['date', 'exdate', 'moneyness'], inplace=True)
-    
-    # get common indices
-    common_index = call_options.index.intersection(put_options.index)
+    keys = ['date', 'exdate', 'moneyness_tick']
+    calls = call_options.assign(moneyness_tick=np.rint(call_options['moneyness'].to_numpy(dtype=np.float64) * 1e8).astype(np.int64)).set_index(keys)
+    puts = put_options.assign(moneyness_tick=np.rint(put_options['moneyness'].to_numpy(dtype=np.float64) * 1e8).astype(np.int64)).drop(columns='moneyness').set_index(keys)
 
-    # Extract the matching entries
-    matching_calls = call_options.loc[common_index]
-    matching_puts = put_options.loc[common_index]
-    
-    result = (matching_calls, matching_puts)
+    # join on the (date, exdate, moneyness tick) index: the keys are not copied into suffixed columns
+    matched_options = calls.join(puts, how='inner', lsuffix='_C', rsuffix='_P')
+    matched_options = matched_options.reset_index('moneyness_tick', drop=True).set_index('moneyness', append=True)
 
-    return result
+    return matched_options
 
 
 def test_price_strike_match(matching_calls_puts):
@@ -247,14 +306,16 @@ def calc_implied_interest_rate(matched_options):
         except KeyError:
             K = matched_options['strike_price']
         
-        # 1/T = 1/time to expiration in years
-        T_inv = np.power((matched_options.reset_index()['exdate']-matched_options.reset_index()['date'])/datetime.timedelta(days=365), -1)
-        T_inv.index=matched_options.index
+        # 1/T = 1/time to expiration in years, from the dates as int64 nanoseconds (columns or index levels)
+        exdate_ns = np.asarray(_get_col(matched_options, 'exdate'), dtype='datetime64[ns]').view(np.int64)
+        date_ns = np.asarray(_get_col(matched_options, 'date'), dtype='datetime64[ns]').view(np.int64)
+        T_inv = (365.0 * 86400.0 * 1e9) / (exdate_ns - date_ns).astype(np.float64)
         
-        C_mid = matched_options['mid_price_C']
-        P_mid = matched_options['mid_price_P']
+        # the quotes may be single precision: promote them, S - C + P is close to K
+        C_mid = matched_options['mid_price_C'].to_numpy(dtype=np.float64)
+        P_mid = matched_options['mid_price_P'].to_numpy(dtype=np.float64)
         # implied interest rate
-        matched_options['pc_parity_int_rate'] = np.log((S-C_mid+P_mid)/K) * T_inv
+        matched_options['pc_parity_int_rate'] = np.log((S.to_numpy() - C_mid + P_mid) / K.to_numpy()) * T_inv
         return matched_options
     else:
         raise ValueError("!! Price and strike price mismatch")
@@ -280,10 +341,10 @@ def pcp_filter_outliers(matched_options, int_rate_rel_distance_func, outlier_thr
     stdev_int_rate_rel_distance = matched_options['rel_distance_int_rate'].std()
 
     # flag outliers based on the threshold
-    matched_options['is_outlier_int_rate'] = matched_options['rel_distance_int_rate'].abs() > outlier_threshold * stdev_int_rate_rel_distance
+    is_outlier_int_rate = np.abs(matched_options['rel_distance_int_rate'].to_numpy()) > outlier_threshold * stdev_int_rate_rel_distance
 
     # filter out the outliers
-    l3_filtered_options = matched_options[~matched_options['is_outlier_int_rate']]
+    l3_filtered_options = matched_options[~is_outlier_int_rate]
 
     # make the dataframe long-form to compare to the level 2 data
     _calls = l3_filtered_options.filter(like='_C').rename(columns=lambda x: x.replace('_C', ''))
@@ -293,7 +354,7 @@ def pcp_filter_outliers(matched_options, int_rate_rel_distance_func, outlier_thr
     return l3_filtered_options
 
 
-def iv_filter_outliers(l2_data, iv_distance_method, iv_outlier_threshold):
+def iv_filter_outliers(l2_data, iv_distance_method, iv_outlier_threshold, keep_outlier_flag=False):
     """
     Filter out outliers based on the relative distance of log_iv and fitted_iv.
 
@@ -301,6 +362,7 @@ def iv_filter_outliers(l2_data, iv_distance_method, iv_outlier_threshold):
     l2_data (DataFrame): Input data containing log_iv, fitted_iv, moneyness columns.
     iv_distance_method (str): Method to calculate relative distance of log_iv and fitted_iv.
     iv_outlier_threshold (float): Threshold value to flag outliers.
+    keep_outlier_flag (bool, optional): If True, also store the outlier flags in the 'is_outlier_iv' column of l2_data. Default is False.
 
     Returns:
     DataFrame: Filtered data without outliers.
@@ -308,20 +370,34 @@ def iv_filter_outliers(l2_data, iv_distance_method, iv_outlier_threshold):
     """
     l2_data['rel_distance_iv'] = calc_relative_distance(l2_data['log_iv'], l2_data['fitted_iv'], method=iv_distance_method)
 
-    # Define moneyness bins
-    bins = np.arange(0.875, 1.125, 0.025)
-    l2_data['moneyness_bin'] = pd.cut(l2_data['moneyness'], bins=bins)
-
-    # Compute standard deviation of relative distances within each moneyness bin
-    std_devs = l2_data.groupby('moneyness_bin')['rel_distance_iv'].std().reset_index(name='std_dev')
-    
-    l2_data['stdev_iv_moneyness_bin'] = l2_data['moneyness_bin'].map(std_devs.set_index('moneyness_bin')['std_dev'])
-    l2_data['stdev_iv_moneyness_bin'].apply(lambda x: x*iv_outlier_threshold).astype(float)
+    # Define moneyness bins (right-closed, as pd.cut): code i is the bin (bins[i], bins[i+1]], -1 outside the bins
+    bins = np.round(np.arange(0.875, 1.125, 0.025), 3)
+    n_bins = len(bins) - 1
+    codes = np.searchsorted(bins, l2_data['moneyness'].to_numpy(), side='left') - 1
+    codes[codes >= n_bins] = -1
+    l2_data['moneyness_bin'] = pd.Categorical.from_codes(codes, categories=pd.IntervalIndex.from_breaks(bins), ordered=True)
+
+    # Compute standard deviation (ddof=1) of relative distances within each moneyness bin, from the bin codes
+    rel_distance = l2_data['rel_distance_iv'].to_numpy(dtype=np.float64)
+    valid = (codes >= 0) & ~np.isnan(rel_distance)
+    valid_codes, valid_rel_distance = codes[valid], rel_distance[valid]
+    count = np.bincount(valid_codes, minlength=n_bins)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.bincount(valid_codes, weights=valid_rel_distance, minlength=n_bins) / count
+        sq_dev = np.bincount(valid_codes, weights=(valid_rel_distance - mean[valid_codes])**2, minlength=n_bins)
+        std_devs = np.sqrt(sq_dev / (count - 1))
+    std_devs[count < 2] = np.nan
+
+    # rows outside the bins get no standard deviation
+    l2_data['stdev_iv_moneyness_bin'] = np.where(codes >= 0, std_devs[codes], np.nan)
     # flag outliers based on the threshold
-    l2_data['is_outlier_iv'] = l2_data['rel_distance_iv'].abs() > l2_data['stdev_iv_moneyness_bin'].apply(lambda x: x*iv_outlier_threshold).astype(float)
+    threshold = l2_data['stdev_iv_moneyness_bin'].to_numpy() * iv_outlier_threshold
+    is_outlier_iv = np.abs(rel_distance) > threshold
+    if keep_outlier_flag:
+        l2_data['is_outlier_iv'] = is_outlier_iv
 
     # filter out the outliers
-    l3_data_iv_only = l2_data[~l2_data['is_outlier_iv']]
+    l3_data_iv_only = l2_data[~is_outlier_iv]
     
     return l3_data_iv_only
 
@@ -356,11 +432,14 @@ def nan_iv_in_l2_data(l2_data, date_range):
     Example:
     nan_iv_in_l2_data(l2_data, '2021-01-01_2021-01-31')
     """
-    nan_iv_calls = l2_data[(l2_data['cp_flag'] == 'C') & (l2_data['IV'].isna())]
-    nan_iv_puts = l2_data[(l2_data['cp_flag'] == 'P') & (l2_data['IV'].isna())]
+    # number of NaN IV records and of all records per option type, in one pass
+    nan_iv_by_type = l2_data['IV'].isna().groupby(l2_data['cp_flag'], sort=False, observed=True)
+    nan_counts, total_counts = nan_iv_by_type.sum(), nan_iv_by_type.size()
+
     nan_iv_summary = pd.DataFrame(index=['Calls', 'Puts'], columns = ['NaN IV Records', 'Total Records', '% NaN IV'])
-    nan_iv_summary.loc['Calls'] = [len(nan_iv_calls), len(l2_data[l2_data['cp_flag'] == 'C']), len(nan_iv_calls)/len(l2_data[l2_data['cp_flag'] == 'C'])*100]
-    nan_iv_summary.loc['Puts'] = [len(nan_iv_puts), len(l2_data[l2_data['cp_flag'] == 'P']), len(nan_iv_puts)/len(l2_data[l2_data['cp_flag'] == 'P'])*100]
+    for label, cp_flag in (('Calls', 'C'), ('Puts', 'P')):
+        n_nan, n_total = int(nan_counts.get(cp_flag, 0)), int(total_counts.get(cp_flag, 0))
+        nan_iv_summary.loc[label] = [n_nan, n_total, n_nan/n_total*100]
     # nan_iv_summary.style.format({'NaN IV Records': '{:,.0f}', 'Total Records': '{:,.0f}', '% NaN IV': '{:.2f}%'}).set_caption(f'Summary of NaN IV Records in Level 2 Filtered Data: {date_range.replace("_", " to ")}')
     
     return nan_iv_summary
@@ -455,6 +534,9 @@ def _plot_fitted_vs_logiv(ax, df, sample_size):
     ax.grid()
 
 def _build_iv_chart(df, date_range, level_tag, title_prefix, sample_size=50000):
+    # matplotlib is only imported when a chart is drawn
+    import matplotlib.pyplot as plt
+
     df = df.copy()
     if 'log_iv' not in df.columns:
         iv = _get_col(df, 'IV')
@@ -471,11 +553,7 @@ def _build_iv_chart(df, date_range, level_tag, title_prefix, sample_size=50000):
     fig.suptitle(f'{title_prefix}: {date_range.replace("_", " to ")}')
     plt.tight_layout()
     filename = f'{level_tag}_{date_range}_iv_summary.png'
-    try:
-        fig.savefig(OUTPUT_DIR / filename)
-    except FileNotFoundError:
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        fig.savefig(OUTPUT_DIR / filename)
+    fig.savefig(OUTPUT_DIR / filename)
 
     plt.show()
     
@@ -521,33 +599,99 @@ def get_filepaths(date_range):
     return l2_input_file, l3_iv_only_output_file, l3_output_file
 
 
-def run_filter(_df, date_range, iv_only=False):
+def load_l2_data(date_range, columns=None, start_date=None, end_date=None):
+    """
+    Loads the level 2 filtered option data of the given date range (see get_filepaths).
+    The Parquet file is scanned lazily with Polars: only the requested columns are read from disk, and the trade date
+    bounds are pushed down to the scan, which skips the row groups outside them.
+
+    Parameters:
+    - date_range (str): The date range of the data.
+    - columns (list, optional): The columns to read. Default is all the columns.
+    - start_date, end_date (str or datetime, optional): Keep the trade dates within these bounds (inclusive).
+
+    Returns:
+    - DataFrame: The level 2 filtered option data.
+    """
+    import polars as pl
+
+    l2_input_file, _, _ = get_filepaths(date_range)
+    l2_scan = pl.scan_parquet(DATA_DIR / l2_input_file)
+    if start_date is not None:
+        l2_scan = l2_scan.filter(pl.col('date') >= pd.Timestamp(start_date).to_pydatetime())
+    if end_date is not None:
+        l2_scan = l2_scan.filter(pl.col('date') <= pd.Timestamp(end_date).to_pydatetime())
+    # without a column list, skip the pandas index that to_parquet may have stored as a column
+    l2_scan = l2_scan.select(columns if columns is not None else pl.exclude(r'^__index_level_\d+__$'))
+    return l2_scan.collect().to_pandas()
+
+
+def run_filter(_df, date_range, iv_only=False, start_date=None, end_date=None):
     """
     Run the L3 filter on option data.
 
     Parameters:
-    - _df: Dummy argument (not used) - included to make this module work with Table B doit.
+    - _df: The level 2 filtered option data. If None, the trade dates within start_date and end_date are loaded from
+      the L2 Parquet file (see load_l2_data), with all their columns, which the L3 IV-filtered output keeps.
     - date_range (tuple): A tuple containing the start and end dates of the date range.
     - iv_only (bool, optional): If True, only run the IV filter. If False, run both the IV filter and the put-call filter. Default is False.
+    - start_date, end_date (str or datetime, optional): The trade date bounds (inclusive) of the data loaded from disk.
 
     Returns:
     - l3_filtered_options (list): A list of filtered option data.
 
     """
     print('>> L3 filter running...')
+    if _df is None:
+        _df = load_l2_data(date_range, start_date=start_date, end_date=end_date)
     
     if iv_only:
         print(' >> Running IV filter only...')
-        l3_data_iv_only = IV_filter(_df, date_range=date_range)
+        _, l3_data_iv_only = IV_filter(_df, date_range=date_range)
         l3_filtered_options = None
     else:
-        l3_data_iv_only = IV_filter(_df, date_range=date_range)
-        l3_filtered_options = put_call_filter(_df, date_range=date_range)
+        _, l3_data_iv_only = IV_filter(_df, date_range=date_range)
+        l3_filtered_options = put_call_filter(l3_data_iv_only, date_range=date_range)
     
     return l3_data_iv_only, l3_filtered_options
 
 
 
+def _write_if_changed(path, content):
+    """
+    Writes the bytes content to path, unless the file already holds exactly these bytes.
+    Keeps the small report files (and their modification times) untouched when a rerun produces the same results.
+    """
+    path = Path(path)
+    # compare with the file on disk every time: it may have been removed or rewritten since this process last wrote it
+    if not path.exists() or path.read_bytes() != content:
+        path.write_bytes(content)
+
+
+def write_parquet_by_date(df, path):
+    """
+    Writes df to a zstd-compressed Parquet file with one row group per trade date, converting one date at a time.
+    Readers filtering on date can skip whole row groups using their min/max statistics.
+
+    Parameters:
+    - df (DataFrame): The option data, with a 'date' column.
+    - path (str or Path): The Parquet file to write.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date', kind='stable')
+    # row positions where a new date starts
+    dates = df['date'].to_numpy()
+    starts = np.flatnonzero(np.concatenate(([True], dates[1:] != dates[:-1], [True])))
+
+    schema = pa.Schema.from_pandas(df.iloc[:0])
+    with pq.ParquetWriter(path, schema, compression='zstd', write_statistics=True) as writer:
+        for start, stop in zip(starts[:-1], starts[1:]):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:stop], schema=schema))
+
+
 def compare_to_optionmetrics(l2_data, l3_data_iv_only, l3_filtered_options, date_range):
     """
     Compare the data from different levels of filtering to OptionMetrics data (1996 - 2012 only).
@@ -568,8 +712,10 @@ def compare_to_optionmetrics(l2_data, l3_data_iv_only, l3_filtered_options, date
     final_result_compare.loc[('Level 3 filters', 'Put-call parity filter'), 'Deleted'] = len(l3_data_iv_only)-len(l3_filtered_options)
     final_result_compare.loc[('Level 3 filters', 'All'), 'Remaining'] = len(l3_filtered_options)    
     final_result_compare = pd.merge(final_result_compare, build_check_results(), left_index=True, right_index=True, suffixes=(f' - Implemented_{date_range.replace("-01", "").replace("-02", "").replace("-12","")}', ' - OptionMetrics_1996-2012'))
-    final_result_compare.to_parquet(OUTPUT_DIR / f'L3_{date_range}_Final_vs_OptionMetrics.parquet')
-    final_result_compare.to_latex(OUTPUT_DIR / f'L3_{date_range}_Final_vs_OptionMetrics.tex')
+    parquet_buffer = io.BytesIO()
+    final_result_compare.to_parquet(parquet_buffer)
+    _write_if_changed(OUTPUT_DIR / f'L3_{date_range}_Final_vs_OptionMetrics.parquet', parquet_buffer.getvalue())
+    _write_if_changed(OUTPUT_DIR / f'L3_{date_range}_Final_vs_OptionMetrics.tex', final_result_compare.to_latex().encode())
     print(' |-- Comparison to OptionMetrics complete, files saved.')
     
     return final_result_compare
@@ -582,21 +728,27 @@ def IV_filter(l2_data, date_range):
     """
     print(' \n>> Running IV filter...')
 
-    # Step 1: Ensure log(IV)
+    # Step 1: Ensure log(IV). The quotes of the put-call parity filter only need single precision (the underlying and
+    # strike prices stay in double precision for the implied rate).
+    l2_data = l2_data.astype({col: np.float32 for col in ['best_bid', 'best_offer', 'tb_m3'] if col in l2_data.columns})
     l2_data['log_iv'] = np.log(l2_data['IV'])
 
     # Step 2: Fit quadratic IV model and append fitted IV
     print(' |-- IV filter: applying quadratic fit...')
     l2_data = apply_quadratic_iv_fit(l2_data)
+    # the relative distances and outlier flags only need single precision; moneyness stays in double precision, since
+    # values on a bin edge (0.925, 0.975, ...) would round above it in float32 and move into the next bin
+    l2_data = l2_data.astype({col: np.float32 for col in ['IV', 'log_iv', 'fitted_iv']})
 
     # Step 3: Filter outliers to produce Level 3
     print(' |-- IV filter: filtering outliers...')
     l3_data_iv_only = iv_filter_outliers(l2_data, 'percent', 2.0)
-    l3_data_iv_only['moneyness_bin'] = l3_data_iv_only['moneyness_bin'].astype(str)
+    # Parquet cannot store interval categories: label the bins as strings, once per category rather than per row
+    l3_data_iv_only['moneyness_bin'] = l3_data_iv_only['moneyness_bin'].cat.rename_categories(str)
 
     # Step 4: Save filtered output
     print(' |-- IV filter: saving L3 IV-filtered data...')
-    l3_data_iv_only.to_parquet(DATA_DIR / f'L3_IV_filter_only_{date_range}.parquet')
+    write_parquet_by_date(l3_data_iv_only, DATA_DIR / f'L3_IV_filter_only_{date_range}.parquet')
 
     return l2_data, l3_data_iv_only
 
@@ -628,15 +780,13 @@ def put_call_filter(df, date_range):
     # calculate bid-ask midpoint
     print(' |-- PCP filter: calculating bid-ask midpoint...')
     df['mid_price'] = (df['best_bid'] + df['best_offer']) / 2
-    # extract all the call options
-    call_options = df.xs('C', level='cp_flag')
-    # extract all the put options
-    put_options = df.xs('P', level='cp_flag')
+    # split calls and puts with one comparison each on the option type codes, rather than two xs scans of the index
+    cp_flag = df.index.get_level_values('cp_flag')
+    call_options = df[cp_flag == 'C']
+    put_options = df[cp_flag == 'P']
     
     print(' |-- PCP filter: building put-call pairs...')
-    matching_calls, matching_puts = build_put_call_pairs(call_options.reset_index(drop=True), put_options.reset_index(drop=True))
-    # match the puts and calls
-    matched_options = pd.merge(matching_calls, matching_puts, on=['date', 'exdate', 'moneyness'], suffixes=('_C', '_P'))
+    matched_options = build_put_call_pairs(call_options, put_options)
     
     # calculate the PCP implied interest rate 
     print(' |-- PCP filter: calculating PCP implied interest rate...')
@@ -644,8 +794,7 @@ def put_call_filter(df, date_range):
     matched_options[matched_options['tb_m3_C'].eq(matched_options['tb_m3_P']) == False][['tb_m3_C', 'tb_m3_P']].isna().sum()
     
     # Calculate the daily median implied interest rate from the T-Bill data (same for calls and puts on a given day)
-    daily_median_int_rate = matched_options.groupby('date')['tb_m3_C'].median().reset_index(name='daily_median_rate')
-    matched_options = matched_options.join(daily_median_int_rate.set_index('date'), on='date')
+    matched_options['daily_median_rate'] = matched_options.groupby('date', sort=False, observed=True)['tb_m3_C'].transform('median')
     
     print(' |-- PCP filter: filtering outliers...')
     l3_filtered_options = pcp_filter_outliers(matched_options, 'percent', 2.0)
@@ -668,11 +817,25 @@ def put_call_filter(df, date_range):
     return l3_filtered_options
 
 
+def _chart_arrays(data):
+    """
+    NumPy arrays of the plotted columns of data, with the row positions of the calls ('C') and puts ('P').
+    Extracted once per chart rather than once per panel.
+    """
+    arrays = {col: data[col].to_numpy() for col in ['moneyness', 'IV', 'log_iv', 'fitted_iv', 'rel_distance_iv'] if col in data.columns}
+    cp_flag = data['cp_flag'].to_numpy()
+    arrays['C'] = np.flatnonzero(cp_flag == 'C')
+    arrays['P'] = np.flatnonzero(cp_flag == 'P')
+    return arrays
+
+
 def common_iv_charts(data, date_range, fig_name, plot_nan_iv=False, has_fitted_iv=False, has_rel_dist=False, output_dir=OUTPUT_DIR):
     """
     Generalized function to plot IV-related charts.
     Parameters control which additional panels are drawn.
     """
+    import matplotlib.pyplot as plt
+
     if plot_nan_iv:
         fig, ax = plt.subplots(2, 3, figsize=(12, 8))
     elif has_rel_dist:
@@ -680,58 +843,63 @@ def common_iv_charts(data, date_range, fig_name, plot_nan_iv=False, has_fitted_i
     else:
         fig, ax = plt.subplots(2, 3, figsize=(12, 8))
 
-    ax[0, 0].hist(data['IV'], bins=250, color='darkblue')
+    arrays = _chart_arrays(data)
+    moneyness, iv, log_iv = arrays['moneyness'], arrays['IV'], arrays['log_iv']
+
+    ax[0, 0].hist(iv, bins=250, color='darkblue')
     ax[0, 0].set(xlabel='IV', ylabel='Frequency', title='Distribution of IV')
     ax[0, 0].grid()
 
-    ax[0, 1].hist(data['log_iv'], bins=250, color='grey')
+    ax[0, 1].hist(log_iv, bins=250, color='grey')
     ax[0, 1].set(xlabel='log(IV)', ylabel='Frequency', title='Distribution of log(IV)')
     ax[0, 1].grid()
 
     if has_fitted_iv:
-        ax[0, 2].scatter(data['log_iv'], data['fitted_iv'], color='darkblue', alpha=0.1)
-        ax[0, 2].plot([data['log_iv'].min(), data['log_iv'].max()],
-                      [data['log_iv'].min(), data['log_iv'].max()],
+        ax[0, 2].scatter(log_iv, arrays['fitted_iv'], color='darkblue', alpha=0.1)
+        ax[0, 2].plot([np.nanmin(log_iv), np.nanmax(log_iv)],
+                      [np.nanmin(log_iv), np.nanmax(log_iv)],
                       color='red', linestyle='--')
         ax[0, 2].set(xlabel='log(IV)', ylabel='Fitted log(IV)', title='log(IV) vs Fitted log(IV)')
         ax[0, 2].grid()
     elif plot_nan_iv:
-        nan_calls = data[(data['cp_flag'] == 'C') & (data['IV'].isna())]
-        nan_puts = data[(data['cp_flag'] == 'P') & (data['IV'].isna())]
-        if nan_calls.empty and nan_puts.empty:
+        # both NaN IV panels come from one NaN mask, with the dates coded as integers
+        is_nan_iv = np.isnan(iv)
+        date_codes, dates = pd.factorize(data['date'])
+        nan_calls = arrays['C'][is_nan_iv[arrays['C']]]
+        nan_puts = arrays['P'][is_nan_iv[arrays['P']]]
+        if len(nan_calls) == 0 and len(nan_puts) == 0:
             ax[0, 2].axis('off')
             ax[1, 2].axis('off')
         else:
-            ax[0, 2].scatter(nan_calls['date'], nan_calls['moneyness'], color='blue', alpha=0.1, s=10, label='Calls')
-            ax[0, 2].scatter(nan_puts['date'], nan_puts['moneyness'], color='red', alpha=0.1, s=10, label='Puts')
+            ax[0, 2].scatter(dates[date_codes[nan_calls]], moneyness[nan_calls], color='blue', alpha=0.1, s=10, label='Calls')
+            ax[0, 2].scatter(dates[date_codes[nan_puts]], moneyness[nan_puts], color='red', alpha=0.1, s=10, label='Puts')
             ax[0, 2].set(xlabel='Trade Date', ylabel='Moneyness', title='Moneyness of NaN IV Options')
             ax[0, 2].legend()
             ax[0, 2].grid()
 
-            pct_nan = data.groupby(['date', 'cp_flag'])['IV'].apply(lambda x: x.isna().mean() * 100)
-            ax[1, 2].scatter(pct_nan[pct_nan.index.get_level_values(1) == 'C'].index.get_level_values(0),
-                             pct_nan[pct_nan.index.get_level_values(1) == 'C'].values,
-                             color='blue', alpha=0.1, s=10, label='Calls')
-            ax[1, 2].scatter(pct_nan[pct_nan.index.get_level_values(1) == 'P'].index.get_level_values(0),
-                             pct_nan[pct_nan.index.get_level_values(1) == 'P'].values,
-                             color='red', alpha=0.1, s=10, label='Puts')
+            # % NaN IV by date and option type (NaN where a date has no options of that type)
+            for flag, color, label in [('C', 'blue', 'Calls'), ('P', 'red', 'Puts')]:
+                rows = arrays[flag]
+                n_total = np.bincount(date_codes[rows], minlength=len(dates))
+                n_nan = np.bincount(date_codes[rows], weights=is_nan_iv[rows], minlength=len(dates))
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    pct_nan = n_nan / n_total * 100
+                ax[1, 2].scatter(dates, pct_nan, color=color, alpha=0.1, s=10, label=label)
             ax[1, 2].set(xlabel='Trade Date', ylabel='% NaN IV', title='NaN IV % by Date')
             ax[1, 2].legend()
             ax[1, 2].grid()
     else:
         ax[0, 2].axis('off')
 
-    grouped = data.set_index(['date', 'exdate', 'cp_flag'])
-
     for i, flag in enumerate(['C', 'P']):
-        subset = grouped.xs(flag, level='cp_flag')
-        ax[1, i].scatter(subset['moneyness'], np.exp(subset['log_iv']), alpha=0.1, label=flag,
+        rows = arrays[flag]
+        ax[1, i].scatter(moneyness[rows], iv[rows], alpha=0.1, label=flag,
                          color='blue' if flag == 'C' else 'red')
         ax[1, i].set(xlabel='Moneyness', ylabel='IV', title=f'IV vs Moneyness ({flag})')
         ax[1, i].grid()
 
         if has_rel_dist:
-            ax[2, i].scatter(subset['moneyness'], subset['rel_distance_iv'], alpha=0.1,
+            ax[2, i].scatter(moneyness[rows], arrays['rel_distance_iv'][rows], alpha=0.1,
                              color='blue' if flag == 'C' else 'red')
             ax[2, i].set(xlabel='Moneyness', ylabel='Relative Distance %',
                          title=f'Rel. Distance logIV-fitted IV ({flag})')
@@ -745,11 +913,12 @@ def common_iv_charts(data, date_range, fig_name, plot_nan_iv=False, has_fitted_i
     plt.tight_layout()
 
     output_file = os.path.join(output_dir, f'L3_{date_range}_{fig_name}.png')
-    os.makedirs(output_dir, exist_ok=True)
+    if Path(output_dir) != OUTPUT_DIR:
+        os.makedirs(output_dir, exist_ok=True)
     fig.savefig(output_file)
     plt.close(fig)
 
 
 if __name__ == "__main__": 
     date_range = f'{START_DATE_01[:7]}_{END_DATE_01[:7]}'
-    df = run_filter(_df=None, date_range=date_range, iv_only=False)
\ No newline at end of file
+    df = run_filter(_df=None, date_range=date_range, iv_only=False, start_date=START_DATE_01, end_date=END_DATE_01)
\ No newline at end of file
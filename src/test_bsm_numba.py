@@ -0,0 +1,88 @@
+"""
+Tests for the Numba-compiled pricer and implied volatility solvers in bsm_numba, against bsm_pricer and scipy.
+"""
+
+import numpy as np
+import pytest
+from scipy.optimize import brentq
+from scipy.stats import norm
+
+import bsm_pricer as bsm
+import bsm_numba as bn
+
+
+def test_iv_newton_raphson_unattainable_price_is_nan():
+    # below intrinsic and above the underlying price: no volatility reaches these prices
+    assert np.isnan(bn.iv_newton_raphson(0.0001, 100, 50, 1, 0.05, is_call=True))
+    assert np.isnan(bn.iv_newton_raphson(150.0, 100, 100, 1, 0.05, is_call=True))
+
+
+def test_iv_newton_raphson_recovers_volatility():
+    c = bsm.european_call_price(100, 125, 1.25, 0.05, 0.3)
+    p = bsm.european_put_price(100, 90, 0.5, 0.03, 0.25)
+    assert bn.iv_newton_raphson(c, 100, 125, 1.25, 0.05, is_call=True) == pytest.approx(0.3, abs=1e-8)
+    assert bn.iv_newton_raphson(p, 100, 90, 0.5, 0.03, is_call=False) == pytest.approx(0.25, abs=1e-8)
+
+
+def _scipy_price(S, K, T, r, sigma, is_call):
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    if is_call:
+        return S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
+    return K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+
+
+def test_calc_implied_volatility_batch_matches_scipy():
+    rng = np.random.default_rng(0)
+    n = 200
+    S = 1400.0
+    K = rng.uniform(1150, 1650, n)
+    T = rng.uniform(7, 180, n) / 365
+    r = 0.03
+    sigma = rng.uniform(0.08, 0.8, n)
+    is_call = rng.random(n) < 0.5
+    market = np.array([_scipy_price(S, k, t, r, s, c) for k, t, s, c in zip(K, T, sigma, is_call)])
+    # unattainable: below intrinsic for a deep in-the-money call and put, above the underlying price
+    K[:3], is_call[:3], market[:3] = [1150.0, 1650.0, 1400.0], [True, False, True], [0.0001, 0.0001, 1e4]
+
+    iv = bn.calc_implied_volatility_batch(market, S, K, T, r, is_call)
+
+    # reference: scipy root finding on the scipy.stats.norm price, NaN where there is no sign change on [1e-5, 5]
+    expected = np.full(n, np.nan)
+    for i in range(n):
+        f = lambda s: _scipy_price(S, K[i], T[i], r, s, is_call[i]) - market[i]
+        if f(0.00001) * f(5.0) < 0:
+            expected[i] = brentq(f, 0.00001, 5.0, xtol=1e-14)
+
+    # quotes far below a tick are within the price tolerance for a whole range of volatilities: not identifiable
+    quoted = market > 1e-4
+    np.testing.assert_array_equal(np.isnan(iv[quoted]), np.isnan(expected[quoted]))
+    assert np.isnan(iv[:3]).all()
+    np.testing.assert_allclose(iv[quoted], expected[quoted], atol=1e-7, equal_nan=True)
+
+
+def test_calc_implied_volatility_batch_broadcasts():
+    K = np.array([[90.0, 100.0, 110.0], [95.0, 105.0, 115.0]])
+    is_call = np.array([[True, True, False], [False, True, False]])
+    market = np.where(is_call, bn.european_call_price_ufunc(100.0, K, 0.5, 0.02, 0.25),
+                      bn.european_put_price_ufunc(100.0, K, 0.5, 0.02, 0.25))
+    iv = bn.calc_implied_volatility_batch(market, 100.0, K, 0.5, 0.02, is_call)
+    assert iv.shape == K.shape
+    np.testing.assert_allclose(iv, 0.25, atol=1e-8)
+
+
+def test_price_ufuncs_match_scipy():
+    rng = np.random.default_rng(1)
+    n = 500
+    S = rng.uniform(800, 2000, n)
+    K = S * rng.uniform(0.7, 1.3, n)
+    T = rng.uniform(7, 365, n) / 365
+    r = rng.uniform(0.0, 0.06, n)
+    sigma = rng.uniform(0.05, 1.0, n)
+    call = bn.european_call_price_ufunc(S, K, T, r, sigma)
+    put = bn.european_put_price_ufunc(S, K, T, r, sigma)
+    np.testing.assert_allclose(call, _scipy_price(S, K, T, r, sigma, True), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(put, _scipy_price(S, K, T, r, sigma, False), rtol=1e-9, atol=1e-9)
+    # the vectorized pricers of bsm_pricer dispatch to these ufuncs, and agree with the NumPy path
+    np.testing.assert_allclose(bsm.european_call_price_vec(S, K, T, r, sigma), bsm.price_and_vega_vec(S, K, T, r, sigma, is_call=True)[0], rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(bsm.european_put_price_vec(S, K, T, r, sigma), bsm.price_and_vega_vec(S, K, T, r, sigma, is_call=False)[0], rtol=1e-9, atol=1e-9)
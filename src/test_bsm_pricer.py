@@ -0,0 +1,71 @@
+"""
+Tests for the Black-Scholes-Merton pricer and implied volatility solvers in bsm_pricer.
+"""
+
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+import bsm_pricer as bsm
+
+
+def test_iv_vectorized_unattainable_price_is_nan():
+    # a call quoted below intrinsic has no implied volatility: NaN, not the lower bound
+    c = bsm.european_call_price(100, 125, 1.25, 0.05, 0.3)
+    iv = bsm.iv_newton_raphson_vectorized([0.0001, c], 100, [50, 125], [1, 1.25], 0.05, 'call')
+    assert np.isnan(iv[0])
+    assert iv[1] == pytest.approx(0.3, abs=1e-8)
+
+
+def test_iv_vectorized_unattainable_high_price_is_nan():
+    # a call quoted above the underlying price has no implied volatility either
+    iv = bsm.iv_newton_raphson_vectorized([150.0], 100, 100, 1, 0.05, 'call')
+    assert np.isnan(iv[0])
+
+
+def test_calc_implied_volatility_array_matches_scalar():
+    # the array path (iv_chain_parallel) and the scalar path agree option by option, NaN included
+    S, r = 100.0, 0.05
+    K = np.array([50.0, 80.0, 100.0, 125.0, 90.0, 110.0])
+    T = np.array([1.0, 0.5, 0.25, 1.25, 0.5, 0.75])
+    sigma = np.array([0.3, 0.2, 0.25, 0.3, 0.35, 0.4])
+    option_type = np.array(['C', 'C', 'C', 'C', 'P', 'P'])
+    market_price = np.array([bsm.european_call_price(S, k, t, r, s) if f == 'C' else bsm.european_put_price(S, k, t, r, s)
+                             for k, t, s, f in zip(K, T, sigma, option_type)])
+    market_price[0] = 0.0001  # below intrinsic
+
+    iv_array = bsm.calc_implied_volatility(market_price, S, K, T, r, option_type)['newton_raphson']
+    iv_scalar = np.array([bsm.calc_implied_volatility(p, S, k, t, r, 'call' if f == 'C' else 'put')['newton_raphson']
+                          for p, k, t, f in zip(market_price, K, T, option_type)])
+
+    np.testing.assert_array_equal(np.isnan(iv_array), np.isnan(iv_scalar))
+    assert np.isnan(iv_array[0])
+    np.testing.assert_allclose(iv_array[1:], iv_scalar[1:], atol=1e-8)
+    np.testing.assert_allclose(iv_array[1:], sigma[1:], atol=1e-8)
+
+
+def test_norm_pdf_cdf_match_scipy():
+    x = [-2.5, -0.1, 0.0, 0.2, 3.0]
+    np.testing.assert_allclose(bsm.norm_pdf(x), norm.pdf(x), rtol=1e-14)
+    np.testing.assert_allclose(bsm.norm_cdf(x), norm.cdf(x), rtol=1e-14)
+    np.testing.assert_allclose(bsm.norm_pdf(np.array(x)), norm.pdf(x), rtol=1e-14)
+    assert bsm.norm_pdf(0.2) == pytest.approx(norm.pdf(0.2), rel=1e-14)
+    assert bsm.norm_cdf(0.2) == pytest.approx(norm.cdf(0.2), rel=1e-14)
+
+
+def test_calc_implied_volatility_scalar_flag_types():
+    c = bsm.european_call_price(100, 110, 0.5, 0.03, 0.25)
+    for flag in ['call', 'C', np.str_('C'), True, np.bool_(True)]:
+        iv = bsm.calc_implied_volatility(c, 100, 110, 0.5, 0.03, flag)['newton_raphson']
+        assert isinstance(iv, float)
+        assert iv == pytest.approx(0.25, abs=1e-8)
+
+
+def test_calc_implied_volatility_array_uses_bounds_and_initial_guess():
+    K = np.array([90.0, 110.0])
+    market_price = np.array([bsm.european_call_price(100, k, 0.5, 0.03, 0.25) for k in K])
+    iv = bsm.calc_implied_volatility(market_price, 100, K, 0.5, 0.03, 'call', initial_guess=0.4)['newton_raphson']
+    np.testing.assert_allclose(iv, 0.25, atol=1e-8)
+    # the volatility lies outside the bounds: no root
+    iv = bsm.calc_implied_volatility(market_price, 100, K, 0.5, 0.03, 'call', bounds=(0.3, 5.0), initial_guess=0.5)['newton_raphson']
+    assert np.isnan(iv).all()
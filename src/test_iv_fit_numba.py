@@ -0,0 +1,32 @@
+"""
+Tests for the Numba-compiled quadratic fit kernel in iv_fit_numba, against np.polyfit.
+"""
+
+import numpy as np
+import pytest
+
+import iv_fit_numba
+
+# the threshold level_3_filters passes to the kernel (level_3_filters._SINGULAR_RTOL)
+SINGULAR_RTOL = 1e-12
+
+
+def test_quadratic_coefs_by_group_matches_polyfit():
+    rng = np.random.default_rng(0)
+    sizes = [3, 12, 30, 7]
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    x = rng.uniform(-0.2, 0.2, offsets[-1])
+    y = np.log(rng.uniform(0.1, 0.6, offsets[-1]))
+    coefs = iv_fit_numba.quadratic_coefs_by_group(offsets, x, y, SINGULAR_RTOL)
+    for g in range(len(sizes)):
+        rows = slice(offsets[g], offsets[g + 1])
+        np.testing.assert_allclose(coefs[g], np.polyfit(x[rows], y[rows], 2)[::-1], rtol=1e-7, atol=1e-9)
+
+
+def test_quadratic_coefs_by_group_nan_for_singular_group():
+    # two distinct strikes: the Gram matrix is singular up to rounding, its determinant is not exactly 0
+    x = np.array([1.02, 1.02, 1.0325, 1.0325, 0.9, 1.0, 1.1]) - 1.0
+    y = np.log([0.2, 0.22, 0.24, 0.25, 0.3, 0.2, 0.25])
+    coefs = iv_fit_numba.quadratic_coefs_by_group(np.array([0, 4, 7]), x, y, SINGULAR_RTOL)
+    assert np.isnan(coefs[0]).all()
+    np.testing.assert_allclose(coefs[1], np.polyfit(x[4:], y[4:], 2)[::-1], atol=1e-9)
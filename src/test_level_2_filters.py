@@ -0,0 +1,25 @@
+"""
+Tests for the level 2 filters in level_2_filters.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('wrds')
+import level_2_filters as f2
+
+
+def test_calc_days_to_maturity():
+    df = pd.DataFrame({'date': pd.to_datetime(['2000-01-03', '2000-01-03']),
+                       'exdate': pd.to_datetime(['2000-01-10', '2000-07-01'])})
+    days = f2.calc_days_to_maturity(df)['days_to_maturity']
+    assert days.dtype == np.int16
+    assert days.tolist() == [7, 180]
+
+
+def test_days_to_maturity_filter_drops_missing_exdate():
+    df = pd.DataFrame({'date': pd.to_datetime(['2000-01-03', '2000-01-03', '2000-01-03']),
+                       'exdate': pd.to_datetime(['2000-01-10', None, '2000-03-18'])})
+    assert np.isnan(f2.calc_days_to_maturity(df)['days_to_maturity'].iloc[1])
+    assert f2.days_to_maturity_filter(df)['exdate'].tolist() == list(pd.to_datetime(['2000-01-10', '2000-03-18']))
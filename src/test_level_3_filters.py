@@ -0,0 +1,120 @@
+"""
+Tests for the per-group quadratic IV fit of the level 3 filters in level_3_filters, against np.polyfit.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('wrds')
+import level_3_filters as f3
+
+
+def _polyfit_by_group(codes, x, y):
+    fitted = np.empty_like(y)
+    for g in np.unique(codes):
+        rows = codes == g
+        fitted[rows] = np.polyval(np.polyfit(x[rows], y[rows], 2), x[rows])
+    return fitted
+
+
+def _groups():
+    rng = np.random.default_rng(0)
+    sizes = [4, 3, 12, 30, 7]
+    codes = np.repeat(np.arange(len(sizes)), sizes)
+    x = rng.uniform(0.8, 1.2, codes.size)
+    # group 0 only has two distinct strikes: its quadratic is not identified, the fitted values still are
+    x[:4] = [1.02, 1.02, 1.0325, 1.0325]
+    y = np.log(rng.uniform(0.1, 0.6, codes.size))
+    return codes, x, y
+
+
+@pytest.mark.filterwarnings('ignore::numpy.exceptions.RankWarning')
+def test_quadratic_coefs_matches_polyfit():
+    codes, x, y = _groups()
+    coefs = f3._quadratic_coefs(codes, x - 1.0, y, codes.max() + 1)
+    fitted = coefs[codes, 0] + (x - 1.0) * (coefs[codes, 1] + (x - 1.0) * coefs[codes, 2])
+    np.testing.assert_allclose(fitted, _polyfit_by_group(codes, x, y), atol=1e-9)
+    np.testing.assert_allclose(fitted[:4], [np.mean(y[:2])] * 2 + [np.mean(y[2:4])] * 2, atol=1e-12)
+
+
+@pytest.mark.filterwarnings('ignore::numpy.exceptions.RankWarning')
+def test_quadratic_fit_by_group_matches_polyfit():
+    codes, x, y = _groups()
+    np.testing.assert_allclose(f3.quadratic_fit_by_group(codes, x, y), _polyfit_by_group(codes, x, y), atol=1e-9)
+    # unsorted groups take the NumPy path
+    order = np.random.default_rng(1).permutation(codes.size)
+    np.testing.assert_allclose(f3.quadratic_fit_by_group(codes[order], x[order], y[order]),
+                               _polyfit_by_group(codes, x, y)[order], atol=1e-9)
+
+
+def test_write_if_changed_rewrites_removed_or_modified_file(tmp_path):
+    path = tmp_path / 'report.tex'
+    f3._write_if_changed(path, b'table')
+    path.unlink()
+    f3._write_if_changed(path, b'table')
+    assert path.read_bytes() == b'table'
+
+    path.write_bytes(b'edited')
+    f3._write_if_changed(path, b'table')
+    assert path.read_bytes() == b'table'
+
+
+def test_write_if_changed_keeps_identical_file(tmp_path):
+    path = tmp_path / 'report.tex'
+    f3._write_if_changed(path, b'table')
+    mtime = path.stat().st_mtime_ns
+    f3._write_if_changed(path, b'table')
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_quadratic_fit_by_group_refits_only_singular_groups(monkeypatch):
+    pytest.importorskip('iv_fit_numba')
+    codes, x, y = _groups()
+    fitted_groups = []
+    quadratic_coefs = f3._quadratic_coefs
+
+    def counting_quadratic_coefs(codes, x, y, n_groups):
+        fitted_groups.append(n_groups)
+        return quadratic_coefs(codes, x, y, n_groups)
+
+    monkeypatch.setattr(f3, '_quadratic_coefs', counting_quadratic_coefs)
+    fitted = f3.quadratic_fit_by_group(codes, x, y)
+    # only the two-strike group goes through the NumPy fallback
+    assert fitted_groups == [1]
+    np.testing.assert_allclose(fitted[:4], [np.mean(y[:2])] * 2 + [np.mean(y[2:4])] * 2, atol=1e-12)
+
+
+def test_iv_filter_keeps_bin_edge_moneyness_in_its_bin(tmp_path, monkeypatch):
+    monkeypatch.setattr(f3, 'DATA_DIR', tmp_path)
+    moneyness = np.array([0.9, 0.91, 0.925, 0.95, 0.975, 1.0, 1.025])
+    l2_data = pd.DataFrame({'date': pd.Timestamp('2000-01-03'), 'exdate': pd.Timestamp('2000-02-19'), 'cp_flag': 'C',
+                            'moneyness': moneyness, 'IV': 0.2 + 0.5 * (moneyness - 1.0) ** 2,
+                            'best_bid': 1.0, 'best_offer': 1.1, 'tb_m3': 0.05})
+    fit, _ = f3.IV_filter(l2_data, 'x')
+    # moneyness bins are right-closed: each edge belongs to the bin below it
+    assert fit['moneyness'].dtype == np.float64
+    assert fit['moneyness_bin'].astype(str).tolist() == ['(0.875, 0.9]', '(0.9, 0.925]', '(0.9, 0.925]', '(0.925, 0.95]',
+                                                          '(0.95, 0.975]', '(0.975, 1.0]', '(1.0, 1.025]']
+
+
+def test_build_put_call_pairs_float32_moneyness():
+    # the tick is computed in float64: the same moneyness stored as float32 and as float64 gets the same key
+    moneyness = np.array([0.93751234, 1.00002501, 1.0723456], dtype=np.float32)
+    calls = pd.DataFrame({'date': pd.Timestamp('2000-01-03'), 'exdate': pd.Timestamp('2000-02-19'),
+                          'moneyness': moneyness, 'strike_price': [1312.5, 1400.0, 1501.25]})
+    puts = calls.astype({'moneyness': np.float64})
+    pairs = f3.build_put_call_pairs(calls, puts)
+    assert len(pairs) == 3
+    np.testing.assert_array_equal(pairs['strike_price_C'], pairs['strike_price_P'])
+
+
+@pytest.mark.filterwarnings('ignore::numpy.exceptions.RankWarning')
+def test_numba_kernel_uses_the_numpy_singularity_threshold(monkeypatch):
+    iv_fit_numba = pytest.importorskip('iv_fit_numba')
+    codes, x, y = _groups()
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(codes))))
+    # with a threshold above every relative determinant, every group is singular
+    monkeypatch.setattr(f3, '_SINGULAR_RTOL', 1.0)
+    assert np.isnan(iv_fit_numba.quadratic_coefs_by_group(offsets, x - 1.0, y, f3._SINGULAR_RTOL)).all()
+    np.testing.assert_allclose(f3.quadratic_fit_by_group(codes, x, y), _polyfit_by_group(codes, x, y), atol=1e-9)